@@ -0,0 +1,279 @@
+import numpy as np
+
+
+# number of change point candidates change_points hands to PELT over the whole series, summed over all segments
+PELT_GRID_SIZE = 4096
+
+
+class SegmentCost:
+    """L2 cost of segments of a series, i.e. the squared deviation from the segment mean, in O(1) per segment.
+
+    Args:
+        x (np.ndarray): The series.
+    """
+
+    def __init__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        # shift by the mean to keep the prefix sums of squares accurate
+        shifted = x - x.mean() if len(x) > 0 else x
+        self.n = len(x)
+        self.s = np.concatenate(([0.0], np.cumsum(shifted)))
+        self.q = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+
+    def __call__(self, start, end):
+        """Cost of the segments [start, end), vectorized over arrays of starts and ends."""
+        length = end - start
+        s = self.s[end] - self.s[start]
+        return self.q[end] - self.q[start] - s * s / np.maximum(length, 1)
+
+    def mean(self, start, end):
+        """Mean of the segments [start, end) relative to the mean of the series."""
+        return (self.s[end] - self.s[start]) / np.maximum(end - start, 1)
+
+
+def noise_variance(x):
+    """Robust estimate of the noise variance of a series from the median absolute deviation of its differences."""
+    diff = np.diff(np.asarray(x, dtype=np.float64))
+    if len(diff) == 0:
+        return 0.0
+    mad = np.median(np.abs(diff - np.median(diff)))
+    # the difference of two samples has twice the variance of the noise
+    return (mad / 0.6745) ** 2 / 2
+
+
+def default_penalty(x):
+    """BIC-like penalty of a change point, 2 * sigma^2 * log(n)."""
+    return 2 * noise_variance(x) * np.log(max(len(x), 2))
+
+
+def binary_segmentation(x, penalty, min_size=2):
+    """Finds change points by repeatedly splitting segments where the cost decreases most.
+
+    A segment is split at the position minimizing the summed cost of both parts, as long as this gains more than
+    penalty. Each split evaluates all positions of the segment at once.
+
+    Args:
+        x (np.ndarray): The series.
+        penalty (float): Minimum cost reduction of a change point.
+        min_size (int, optional): Minimum number of samples between change points. Defaults to 2.
+
+    Returns:
+        np.ndarray: Sorted indices at which a new segment starts.
+    """
+    cost = SegmentCost(x)
+    found = []
+    stack = [(0, cost.n)]
+    while len(stack) > 0:
+        start, end = stack.pop()
+        if end - start < 2 * min_size:
+            continue
+        splits = np.arange(start + min_size, end - min_size + 1)
+        total = cost(start, splits) + cost(splits, end)
+        best = np.argmin(total)
+        if cost(start, end) - total[best] <= penalty:
+            continue
+        split = int(splits[best])
+        found.append(split)
+        stack += [(start, split), (split, end)]
+    return np.array(sorted(found), dtype=np.int64)
+
+
+def pelt(x, penalty, min_size=2, step=1):
+    """Finds the change points minimizing the total cost plus penalty per change point with PELT.
+
+    The candidate set of the last change point is evaluated at once for each end position and pruned of
+    candidates that can no longer be optimal. With step > 1 this is an approximation: change points are first
+    restricted to multiples of step, so each one may be off by up to step samples, and change points closer than
+    step to each other may be missed. Afterwards each one is moved to its best position within one step to either
+    side, and change points no longer worth their penalty are merged or dropped.
+
+    Args:
+        x (np.ndarray): The series.
+        penalty (float): Cost of a change point.
+        min_size (int, optional): Minimum number of samples between change points. Defaults to 2.
+        step (int, optional): Grid of change point candidates. Defaults to 1.
+
+    Returns:
+        np.ndarray: Sorted indices at which a new segment starts.
+    """
+    cost = SegmentCost(x)
+    n = cost.n
+    grid = np.append(np.arange(0, n, step), n)
+    # segments on the grid need at least min_size samples
+    min_cells = max(-(-min_size // step), 1)
+
+    m = len(grid) - 1
+    best = np.full(m + 1, np.inf)
+    best[0] = -penalty
+    last = np.zeros(m + 1, dtype=np.int64)
+    candidates = np.zeros(1, dtype=np.int64)
+    for t in range(min_cells, m + 1):
+        ready = candidates[candidates <= t - min_cells]
+        total = best[ready] + cost(grid[ready], grid[t])
+        i = np.argmin(total)
+        best[t] = total[i] + penalty
+        last[t] = ready[i]
+        # prune candidates which are worse than t even without the penalty of a further change point
+        candidates = np.concatenate(
+            (ready[total <= best[t]], candidates[candidates > t - min_cells], [t])
+        )
+
+    points = []
+    t = m
+    while t > 0:
+        t = last[t]
+        if t > 0:
+            points.append(int(grid[t]))
+    points = np.array(points[::-1], dtype=np.int64)
+
+    if step > 1 and len(points) > 0:
+        points = _refine(cost, points, penalty, min_size, step)
+    return points
+
+
+def _refine(cost, points, penalty, min_size, step):
+    """Moves change points found on a grid to their best position within one grid cell and drops those no longer
+    worth their penalty, e.g. pairs enclosing a true change point in between two grid positions."""
+    points = points.copy()
+    while len(points) > 0:
+        bounds = np.concatenate(([0], points, [cost.n]))
+        # best position of each change point with its neighbours fixed
+        for i in range(len(points)):
+            lo = max(points[i] - step, bounds[i] + min_size)
+            hi = min(points[i] + step, bounds[i + 2] - min_size)
+            if lo > hi:
+                continue
+            splits = np.arange(lo, hi + 1)
+            total = cost(bounds[i], splits) + cost(splits, bounds[i + 2])
+            points[i] = bounds[i + 1] = splits[np.argmin(total)]
+
+        # replace a pair of change points by a single one if that costs less than the penalty of the second one
+        merged = False
+        for i in range(len(points) - 1):
+            start, end = bounds[i], bounds[i + 3]
+            splits = np.arange(start + min_size, end - min_size + 1)
+            if len(splits) == 0:
+                continue
+            single = cost(start, splits) + cost(splits, end)
+            j = np.argmin(single)
+            pair = (
+                cost(start, bounds[i + 1])
+                + cost(bounds[i + 1], bounds[i + 2])
+                + cost(bounds[i + 2], end)
+            )
+            if single[j] - pair <= penalty:
+                points = np.concatenate((points[:i], [splits[j]], points[i + 2 :]))
+                merged = True
+                break
+        if merged:
+            continue
+
+        gain = (
+            cost(bounds[:-2], bounds[2:])
+            - cost(bounds[:-2], bounds[1:-1])
+            - cost(bounds[1:-1], bounds[2:])
+        )
+        weakest = np.argmin(gain)
+        if gain[weakest] > penalty:
+            break
+        points = np.delete(points, weakest)
+    return points
+
+
+def change_points(x, penalty=None, method="binseg", min_size=2, breaks=None):
+    """Finds change points of a series, optionally treating known breaks (e.g. tuning phases) separately.
+
+    Args:
+        x (np.ndarray): The series.
+        penalty (float, optional): Cost of a change point. Defaults to default_penalty(x).
+        method (str, optional): "binseg" for binary segmentation or "pelt". Defaults to "binseg".
+        min_size (int, optional): Minimum number of samples between change points. Defaults to 2.
+        breaks (np.ndarray, optional): Indices at which the series is split before detection. Defaults to None.
+
+    Returns:
+        np.ndarray: Sorted indices at which a new segment starts, breaks are not included.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if penalty is None:
+        penalty = default_penalty(x)
+
+    bounds = np.unique(np.concatenate(([0], [] if breaks is None else breaks, [len(x)])))
+    bounds = bounds[(bounds >= 0) & (bounds <= len(x))].astype(np.int64)
+    # one grid over the whole series: PELT visits each candidate in a Python loop, so the total number of candidates
+    # bounds the runtime, however many short segments the breaks cut the series into
+    step = -(-len(x) // PELT_GRID_SIZE)
+    found = []
+    for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        match method:
+            case "binseg":
+                points = binary_segmentation(x[start:end], penalty, min_size)
+            case "pelt":
+                points = pelt(x[start:end], penalty, min_size, step)
+            case _:
+                raise NotImplementedError
+        found.append(points + start)
+    return np.concatenate(found) if len(found) > 0 else np.zeros(0, dtype=np.int64)
+
+
+def paying_change_points(x, points, tuning_cost, breaks=None):
+    """Keeps the change points at which retuning could have paid off.
+
+    Retuning at a change point can at most save the change of the mean runtime for every iteration until the next
+    change point. Change points saving less than a tuning phase costs are merged into their neighbours one by one,
+    smallest saving first, until all remaining ones pay off. A drifting runtime thus ends up in as few segments as
+    it takes for retuning to pay off.
+
+    Args:
+        x (np.ndarray): Runtime series.
+        points (np.ndarray): Sorted change points of x.
+        tuning_cost (float): Cost of a tuning phase in the unit of x.
+        breaks (np.ndarray, optional): Known breaks of x, also ending the segment before and after a change point.
+
+    Returns:
+        np.ndarray: The change points that pay off.
+    """
+    cost = SegmentCost(x)
+    breaks = np.zeros(0, dtype=np.int64) if breaks is None else np.asarray(breaks)
+    points = np.asarray(points, dtype=np.int64)
+    while len(points) > 0:
+        bounds = np.unique(np.concatenate(([0], points, breaks, [len(x)]))).astype(np.int64)
+        idx = np.searchsorted(bounds, points)
+        before = cost.mean(bounds[idx - 1], points)
+        after = cost.mean(points, bounds[idx + 1])
+        saving = np.abs(after - before) * (bounds[idx + 1] - points)
+        weakest = np.argmin(saving)
+        if saving[weakest] > tuning_cost:
+            break
+        points = np.delete(points, weakest)
+    return points
+
+
+def match_triggers(oracle, triggers, max_lag):
+    """Matches actual triggers to oracle change points.
+
+    Each oracle iteration is matched to the first trigger not before it and at most max_lag iterations later, which
+    is not matched to an earlier oracle iteration yet.
+
+    Args:
+        oracle (np.ndarray): Sorted iterations at which retuning would have paid off.
+        triggers (np.ndarray): Sorted iterations at which tuning was triggered.
+        max_lag (int): Maximum number of iterations a trigger may lag behind.
+
+    Returns:
+        dict: "lags" of the matched oracle iterations, number of "missed" oracle iterations and "false_positives",
+        the number of triggers not matched to any oracle iteration.
+    """
+    oracle = np.asarray(oracle, dtype=np.int64)
+    triggers = np.asarray(triggers, dtype=np.int64)
+    lags = []
+    pos = 0
+    for it in oracle.tolist():
+        pos = max(pos, np.searchsorted(triggers, it))
+        if pos < len(triggers) and triggers[pos] - it <= max_lag:
+            lags.append(int(triggers[pos] - it))
+            pos += 1
+    return {
+        "lags": np.array(lags, dtype=np.int64),
+        "missed": len(oracle) - len(lags),
+        "false_positives": len(triggers) - len(lags),
+    }
@@ -15,6 +15,8 @@ if importlib.util.find_spec("dotenv") is not None:
     # where the md-flexible executable is located
     MD_FLEX_BINARY = os.getenv("MD_FLEX_BINARY")
     PLOT_DATA_DIR= os.getenv("PLOT_DATA")
+    # sqlite database collecting the results of all runs
+    RESULTS_DB = os.getenv("RESULTS_DB")
     IS_HPC=True
     
 else:
@@ -25,5 +27,6 @@ else:
     CONFIG_DIR = "/dss/dsshome1/09/ge92hed2/bachelor-thesis/experiments/"
     MD_FLEX_BINARY="/dss/dsshome1/09/ge92hed2/AutoPas/build/examples/md-flexible/md-flexible"
     PLOT_DATA_DIR=""
+    RESULTS_DB = "/dss/dsshome1/09/ge92hed2/data/results.sqlite"
     IS_HPC=True
 
@@ -0,0 +1,49 @@
+import numpy as np
+
+# pixel columns of the data area of the figures, 6.4 in at the 300 dpi of the png output
+DECIMATION_COLUMNS = 1920
+
+
+def minmax_decimate(x, y, columns=DECIMATION_COLUMNS, breaks=None):
+    """Reduces a series to the points that stay visible when drawn into a given number of pixel columns.
+
+    The x range is split into columns bins, and only the samples with the smallest and largest y of each bin are kept.
+    This keeps single spikes, which averaging or striding would lose. Bins are additionally split at breaks, and the
+    first and last sample before each break are always kept, so that changes of the configuration remain exactly
+    where they happened. As x is sorted, bins are contiguous and everything runs in O(n).
+
+    Args:
+        x (np.ndarray): Sorted x values, e.g. iterations.
+        y (np.ndarray): Values to draw, NaN is ignored.
+        columns (int, optional): Number of pixel columns of the plot. Defaults to DECIMATION_COLUMNS.
+        breaks (np.ndarray, optional): Indices at which a new segment of the series starts. Defaults to None.
+
+    Returns:
+        np.ndarray: Sorted indices of the samples to draw.
+    """
+    n = len(x)
+    if n <= 2 * columns:
+        return np.arange(n)
+
+    span = max(float(x[-1] - x[0]), 1.0)
+    bins = np.minimum(((x - x[0]) * (columns / span)).astype(np.int64), columns - 1)
+    breaks = np.zeros(0, dtype=np.int64) if breaks is None else np.asarray(breaks, dtype=np.int64)
+    breaks = breaks[(breaks > 0) & (breaks < n)]
+    starts = np.union1d(np.flatnonzero(np.diff(bins)) + 1, breaks)
+    starts = np.concatenate(([0], starts)).astype(np.int64)
+    counts = np.diff(np.append(starts, n))
+    group = np.repeat(np.arange(len(starts)), counts)
+
+    keep = np.zeros(n, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for reduce in (np.fmin, np.fmax):
+            extreme = np.repeat(reduce.reduceat(y, starts), counts)
+            # bins that are all NaN have no extreme and hence no hits
+            hits = np.flatnonzero(y == extreme)
+            if len(hits) == 0:
+                continue
+            # first sample attaining the extreme of each bin
+            keep[hits[np.concatenate(([True], np.diff(group[hits]) != 0))]] = True
+    keep[breaks] = True
+    keep[breaks - 1] = True
+    return np.flatnonzero(keep)
@@ -0,0 +1,152 @@
+import os, ast, json, uuid
+
+from classes.LogCache import CACHE_DIR_NAME, content_hash, fingerprint
+
+# modules rendering the figures, a change to them or to any module they import from classes/ renders all figures again
+PLOT_MODULES = ["PlotData", "PlotStyle"]
+
+_code_hash = None
+
+
+def plot_sources():
+    """Returns the names of PLOT_MODULES and of all modules they import from classes/, directly or indirectly.
+
+    Imports are read from the sources instead of importing the modules, which would pull in matplotlib. Imports
+    inside functions count as well.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    found = set()
+    pending = list(PLOT_MODULES)
+    while len(pending) > 0:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+        with open(os.path.join(here, f"{name}.py")) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module == "classes":
+                pending += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and (node.module or "").startswith("classes."):
+                pending.append(node.module.split(".")[1])
+            elif isinstance(node, ast.Import):
+                pending += [alias.name.split(".")[1] for alias in node.names if alias.name.startswith("classes.")]
+    return sorted(found)
+
+
+def code_hash():
+    """Hashes the sources of plot_sources, once per process."""
+    global _code_hash
+    if _code_hash is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        _code_hash = "".join(content_hash(os.path.join(here, f"{name}.py")) for name in plot_sources())
+    return _code_hash
+
+
+def record_path(output_prefix):
+    """Returns the file recording how the figure written to output_prefix.<ext> was made."""
+    return os.path.join(
+        os.path.dirname(os.path.abspath(output_prefix)),
+        CACHE_DIR_NAME,
+        "figures",
+        f"{os.path.basename(output_prefix)}.json",
+    )
+
+
+def figure_outputs(output_prefix, profile):
+    """Returns the files a figure is written to in the given render profile, see PlotStyle.save_figure."""
+    return [f"{output_prefix}.png"] + ([] if profile == "draft" else [f"{output_prefix}.pdf"])
+
+
+def input_fingerprints(inputs):
+    """Fingerprints the input files of a figure, None for missing ones. Take them before reading the inputs."""
+    return {
+        os.path.basename(f): fingerprint(f) if os.path.isfile(f) else None for f in inputs
+    }
+
+
+def _read_record(output_prefix):
+    try:
+        with open(record_path(output_prefix)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_record(output_prefix, record):
+    path = record_path(output_prefix)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # ranks rendering the same figure concurrently must never leave a partial record
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+
+
+def is_up_to_date(output_prefix, inputs, params, profile):
+    """Checks whether a figure was rendered from the current inputs, parameters and plot code.
+
+    Like LogCache.is_valid, matching size and mtime of an input are accepted as is and the content hash only decides
+    if the mtime differs, e.g. after copying the logs from the cluster. The record is refreshed in that case so the
+    next check is cheap again.
+
+    Args:
+        output_prefix (str): Path of the figure without extension.
+        inputs (list): Paths of the files the figure is made from.
+        params (dict): JSON serializable parameters of the figure.
+        profile (str): Render profile, see PlotStyle.RENDER_PROFILES.
+
+    Returns:
+        bool: False if the figure has to be rendered again.
+    """
+    record = _read_record(output_prefix)
+    if record is None:
+        return False
+    if record.get("code") != code_hash() or record.get("profile") != profile:
+        return False
+    if record.get("params") != json.loads(json.dumps(params)):
+        return False
+    if not all(os.path.isfile(f) for f in figure_outputs(output_prefix, profile)):
+        return False
+
+    sources = record.get("inputs", {})
+    if set(sources) != {os.path.basename(f) for f in inputs}:
+        return False
+    refreshed = False
+    for f in inputs:
+        source = sources[os.path.basename(f)]
+        if source is None or not os.path.isfile(f):
+            if source is not None or os.path.isfile(f):
+                return False
+            continue
+        stat = os.stat(f)
+        if source["size"] != stat.st_size:
+            return False
+        if source["mtime_ns"] == stat.st_mtime_ns:
+            continue
+        if source["hash"] != content_hash(f):
+            return False
+        source["mtime_ns"] = stat.st_mtime_ns
+        refreshed = True
+
+    if refreshed:
+        try:
+            _write_record(output_prefix, record)
+        except OSError:
+            pass
+    return True
+
+
+def record_figure(output_prefix, sources, params, profile):
+    """Records how a figure was rendered, see is_up_to_date.
+
+    Args:
+        output_prefix (str): Path of the figure without extension.
+        sources (dict): Fingerprints of the inputs taken before rendering, see input_fingerprints.
+        params (dict): JSON serializable parameters of the figure.
+        profile (str): Render profile, see PlotStyle.RENDER_PROFILES.
+    """
+    _write_record(
+        output_prefix,
+        {"code": code_hash(), "profile": profile, "params": params, "inputs": sources},
+    )
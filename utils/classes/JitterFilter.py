@@ -0,0 +1,165 @@
+import os
+import numpy as np
+import yaml
+
+# scale of the median absolute deviation of normally distributed noise
+MAD_TO_STD = 1.4826
+
+# lower bound of the noise scale relative to the baseline, keeps runs of identical timings from flagging everything
+MIN_RELATIVE_SCALE = 0.01
+
+
+def running_median(x, w, breaks=None):
+    """Approximates the centered running median of a series in linear time.
+
+    The series is cut into consecutive blocks of w samples whose medians are found by partitioning, i.e. in O(w) each.
+    The medians are placed at the centers of their blocks and linearly interpolated in between, which follows slow
+    drifts of the runtime while a single spike can at most move the median of its block by one rank.
+
+    Args:
+        x (np.ndarray): The series.
+        w (int): Number of samples per block.
+        breaks (np.ndarray, optional): Indices at which the series is split, blocks never span a break, e.g. the
+            positions of removed tuning phases. Defaults to None.
+
+    Returns:
+        np.ndarray: The running median of each sample.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty(len(x))
+    bounds = np.unique(np.concatenate(([0], [] if breaks is None else breaks, [len(x)])))
+    bounds = bounds[(bounds >= 0) & (bounds <= len(x))].astype(np.int64)
+    for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        piece = x[start:end]
+        n = len(piece)
+        if n == 0:
+            continue
+        if n <= w:
+            out[start:end] = np.median(piece)
+            continue
+        blocks = n // w
+        medians = np.median(piece[: blocks * w].reshape(blocks, w), axis=1)
+        centers = np.arange(blocks) * w + (w - 1) / 2
+        if n > blocks * w:
+            # the tail shares its block with the end of the last full one
+            medians = np.append(medians, np.median(piece[-w:]))
+            centers = np.append(centers, n - (w + 1) / 2)
+        out[start:end] = np.interp(np.arange(n), centers, medians)
+    return out
+
+
+def periodic_mask(iteration, interval, offset=0):
+    """Marks the iterations of a periodic event, e.g. applying the thermostat every interval iterations."""
+    return np.asarray(iteration) % interval == offset
+
+
+def thermostat_config(job_path, scenario, config_dir=None):
+    """Returns the yaml file a job was run with, which holds its thermostat interval.
+
+    Args:
+        job_path (str): Directory containing the logs of the job.
+        scenario (str): Scenario of the job, e.g. "exploding-liquid".
+        config_dir (str, optional): Directory with the default.yaml of each scenario, used if the job directory has no
+            config.yaml. Defaults to None.
+
+    Returns:
+        str: Path of the file, which may be missing.
+    """
+    config_file = os.path.join(job_path, "config.yaml")
+    if not os.path.isfile(config_file) and config_dir is not None:
+        config_file = os.path.join(config_dir, scenario, "default.yaml")
+    return config_file
+
+
+def thermostat_interval(config_file):
+    """Reads the thermostat interval of an md-flexible yaml file.
+
+    Args:
+        config_file (str): Path to the yaml file the simulation was run with.
+
+    Returns:
+        int: Number of iterations between applications of the thermostat, None if the file is missing or does not use
+        a thermostat.
+    """
+    if config_file is None or not os.path.isfile(config_file):
+        return None
+    with open(config_file) as f:
+        config = yaml.safe_load(f)
+    thermostat = config.get("thermostat") if isinstance(config, dict) else None
+    if not isinstance(thermostat, dict) or "thermostatInterval" not in thermostat:
+        return None
+    return int(thermostat["thermostatInterval"])
+
+
+class JitterFilter:
+    """Masks iterations whose runtime is distorted by OS noise or periodic events of the simulation.
+
+    An iteration counts as an outlier if its runtime exceeds the running median by more than threshold times the
+    running median absolute deviation. Only slow iterations are flagged, noise can only add time. Iterations of the
+    thermostat are masked regardless of their runtime. Everything is evaluated on whole arrays in O(n).
+
+    Args:
+        window (int, optional): Number of samples per block of the running median. Defaults to 101.
+        threshold (float, optional): Distance from the running median in robust standard deviations above which an
+            iteration is an outlier. Defaults to 5.0.
+        mask_thermostat (bool, optional): Whether to mask the iterations applying the thermostat. Defaults to True.
+    """
+
+    def __init__(self, window=101, threshold=5.0, mask_thermostat=True):
+        if window < 1:
+            raise ValueError("JitterFilter needs a window of at least one sample")
+        self.window = window
+        self.threshold = threshold
+        self.mask_thermostat = mask_thermostat
+
+    def baseline(self, runtime, breaks=None):
+        """Running median of the runtime and the robust standard deviation of the noise around it."""
+        median = running_median(runtime, self.window, breaks)
+        residual = np.abs(np.asarray(runtime, dtype=np.float64) - median)
+        scale = MAD_TO_STD * running_median(residual, self.window, breaks)
+        return median, np.maximum(scale, MIN_RELATIVE_SCALE * np.abs(median))
+
+    def mask(self, runtime, iteration, breaks=None, interval=None):
+        """Finds the distorted iterations.
+
+        Args:
+            runtime (np.ndarray): Runtime of each iteration.
+            iteration (np.ndarray): Iteration number of each runtime.
+            breaks (np.ndarray, optional): Indices at which the runtime changes regardless of noise, e.g. tuning
+                phases. Defaults to None.
+            interval (int, optional): Thermostat interval, see thermostat_interval. Defaults to None.
+
+        Returns:
+            tuple: Boolean mask of the distorted iterations and the running median to replace them with.
+        """
+        median, scale = self.baseline(runtime, breaks)
+        mask = runtime - median > self.threshold * scale
+        if self.mask_thermostat and interval is not None:
+            mask |= periodic_mask(iteration, interval)
+        return mask, median
+
+    @staticmethod
+    def apply(runtime, mask, median):
+        """Returns a copy of runtime with the masked iterations replaced by the running median."""
+        filtered = np.array(runtime, copy=True)
+        filtered[mask] = np.rint(median[mask]).astype(filtered.dtype)
+        return filtered
+
+
+def load_jitter_filter(settings_file):
+    """Builds a JitterFilter from a yaml file mapping any of its arguments to a value, e.g. "window: 201".
+
+    Args:
+        settings_file (str): Path to the yaml file, an empty file gives the default filter.
+
+    Returns:
+        JitterFilter: The configured filter.
+    """
+    with open(settings_file) as f:
+        settings = yaml.safe_load(f) or {}
+    if not isinstance(settings, dict):
+        raise ValueError(f"{settings_file} does not map JitterFilter arguments to values")
+    unknown = set(settings) - {"window", "threshold", "mask_thermostat"}
+    if len(unknown) > 0:
+        raise ValueError(f"Unknown JitterFilter arguments in {settings_file}: {sorted(unknown)}")
+    return JitterFilter(**settings)
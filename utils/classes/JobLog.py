@@ -0,0 +1,132 @@
+import os, re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# md-flexible prints its timers after this line at the very end of the job log
+MEASUREMENTS_MARKER = b"Measurements:"
+
+# bytes read from the end of a job log at first, doubled until the timers are found or MAX_TAIL_BYTES are read
+TAIL_BYTES = 8192
+MAX_TAIL_BYTES = 1 << 20
+
+# "<indent><name> : <time> ns (<seconds>s) = <percentage>%", nested timers are indented below their parent
+TIMER_PATTERN = re.compile(r"^( *)([^:]+?)\s*:\s*(\d+)\s*ns\b")
+TUNING_ITS_PATTERN = re.compile(r"^\s*Tuning iterations\s*:\s*(\d+)(?:\s*/\s*(\d+))?")
+MFUPS_PATTERN = re.compile(r"^\s*MFUPs/sec\s*:\s*([0-9.eE+-]+)")
+
+TOTAL_TIMER = "Total accumulated"
+
+
+def read_tail(log_file):
+    """Reads the end of a job log, starting at the last timer block if there is one.
+
+    Args:
+        log_file (str): Path to the job log.
+
+    Returns:
+        str: The timer block, or the last MAX_TAIL_BYTES of the log if it contains none.
+    """
+    with open(log_file, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        n = TAIL_BYTES
+        while True:
+            n = min(n, size, MAX_TAIL_BYTES)
+            f.seek(size - n)
+            tail = f.read(n)
+            pos = tail.rfind(MEASUREMENTS_MARKER)
+            if pos >= 0:
+                tail = tail[pos:]
+                break
+            if n == size or n == MAX_TAIL_BYTES:
+                break
+            n *= 2
+    return tail.decode(errors="replace")
+
+
+def parse_job_summary(text):
+    """Parses the timer block md-flexible prints at the end of a run.
+
+    Timers are named by their path in the block, e.g. "Total accumulated/Simulate/ForceUpdateTotal/Tuning" for the
+    time spent computing interactions in tuning iterations.
+
+    Args:
+        text (str): The timer block, see read_tail.
+
+    Returns:
+        dict: "timers" maps the path of each timer to its time in ns, "tuning_its" and "iterations" are the number of
+        tuning and of all iterations and "mfups" the million force updates per second, -1 for anything not printed.
+    """
+    summary = {"timers": {}, "tuning_its": -1, "iterations": -1, "mfups": -1.0}
+    parents = []
+    for line in text.splitlines():
+        if m := TIMER_PATTERN.match(line):
+            indent, name, ns = len(m.group(1)), m.group(2).strip(), int(m.group(3))
+            while len(parents) > 0 and parents[-1][0] >= indent:
+                parents.pop()
+            path = "/".join([parent for _, parent in parents] + [name])
+            parents.append((indent, name))
+            summary["timers"][path] = ns
+        elif m := TUNING_ITS_PATTERN.match(line):
+            summary["tuning_its"] = int(m.group(1))
+            if m.group(2) is not None:
+                summary["iterations"] = int(m.group(2))
+        elif m := MFUPS_PATTERN.match(line):
+            summary["mfups"] = float(m.group(1))
+    return summary
+
+
+def read_job_summary(log_file):
+    """Reads the timers at the end of a job log, see parse_job_summary."""
+    return parse_job_summary(read_tail(log_file))
+
+
+def collect_job_summaries(parent_path, workers=16):
+    """Reads the job logs of all jobs in parent_path concurrently into one table.
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        workers (int, optional): Number of threads reading logs. Defaults to 16.
+
+    Returns:
+        np.ndarray: Structured array with one row per job with a job log, sorted by job. Besides "job", "iterations",
+        "tuning_its" and "mfups" it has an int64 field "<timer>[ns]" for every timer found in any log, -1 where a log
+        lacks it.
+    """
+    jobs = sorted(
+        job
+        for job in os.listdir(parent_path)
+        if os.path.isfile(os.path.join(parent_path, job, "job_log.txt"))
+    )
+    logs = [os.path.join(parent_path, job, "job_log.txt") for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        summaries = list(pool.map(read_job_summary, logs))
+
+    # timers in the order md-flexible prints them
+    timers = list(dict.fromkeys(path for s in summaries for path in s["timers"]))
+    dtype = [
+        ("job", f"U{max((len(job) for job in jobs), default=1)}"),
+        ("iterations", np.int64),
+        ("tuning_its", np.int64),
+        ("mfups", np.float64),
+    ] + [(f"{path}[ns]", np.int64) for path in timers]
+
+    table = np.empty(len(jobs), dtype=dtype)
+    table["job"] = jobs
+    for name in ["iterations", "tuning_its", "mfups"]:
+        table[name] = [s[name] for s in summaries]
+    for path in timers:
+        table[f"{path}[ns]"] = [s["timers"].get(path, -1) for s in summaries]
+    return table
+
+
+def write_job_summaries(table, outfile):
+    """Writes a table of collect_job_summaries to outfile.csv."""
+    print("Writing job summaries")
+    np.savetxt(
+        f"{outfile}.csv",
+        table,
+        fmt=["%s", "%d", "%d", "%g"] + ["%d"] * (len(table.dtype.names) - 4),
+        delimiter=",",
+        header=",".join(table.dtype.names),
+        comments="",
+    )
@@ -0,0 +1,172 @@
+import os, json, hashlib, uuid
+import numpy as np
+
+# bump whenever the layout of cached columns changes to invalidate old sidecars
+CACHE_VERSION = 1
+
+# name of the sidecar directory created next to the logs
+CACHE_DIR_NAME = ".plotcache"
+
+
+def cache_path(log_file, kind="columns"):
+    """Returns the sidecar directory holding cached data of the given kind (e.g. columns, index) for log_file."""
+    return os.path.join(
+        os.path.dirname(os.path.abspath(log_file)),
+        CACHE_DIR_NAME,
+        os.path.basename(log_file),
+        kind,
+    )
+
+
+def content_hash(log_file):
+    """Hashes the full content of log_file."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(log_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(log_file):
+    """Returns size, mtime and content hash identifying the current state of log_file."""
+    stat = os.stat(log_file)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": content_hash(log_file),
+    }
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(cache_dir, manifest):
+    # write to a temporary file first so concurrent readers never see a partial manifest
+    tmp = os.path.join(cache_dir, f"manifest.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(cache_dir, "manifest.json"))
+
+
+def is_valid(manifest, log_file, schema, kind="columns"):
+    """Checks whether a manifest still describes the current content of log_file.
+
+    Matching size and mtime are accepted as is. If only the mtime differs (e.g. after copying the logs from the
+    cluster) the content hash decides, and the manifest is refreshed so the next check is cheap again.
+    """
+    if manifest is None:
+        return False
+    if manifest.get("version") != CACHE_VERSION or manifest.get("schema") != schema:
+        return False
+
+    stat = os.stat(log_file)
+    source = manifest["source"]
+    if source["size"] != stat.st_size:
+        return False
+    if source["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if source["hash"] != content_hash(log_file):
+        return False
+
+    source["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_manifest(cache_path(log_file, kind), manifest)
+    except OSError:
+        pass
+    return True
+
+
+def load(log_file, schema, kind="columns"):
+    """Memory-maps the cached columns of log_file.
+
+    Args:
+        log_file (str): Path to the log the columns were parsed from.
+        schema (str): Identifier of the parser that produced the columns.
+        kind (str, optional): Which of the sidecars of log_file to read. Defaults to "columns".
+
+    Returns:
+        dict: Maps column names to read-only memory-mapped arrays, None if there is no valid cache.
+    """
+    cache_dir = cache_path(log_file, kind)
+    manifest = _read_manifest(cache_dir)
+    if not is_valid(manifest, log_file, schema, kind):
+        return None
+
+    try:
+        return {
+            name: np.load(os.path.join(cache_dir, file_name), mmap_mode="r")
+            for name, file_name in manifest["columns"].items()
+        }
+    except (OSError, ValueError):
+        # files were replaced by a concurrent writer
+        return None
+
+
+def store(log_file, schema, columns, source=None, kind="columns"):
+    """Writes parsed columns of log_file to its sidecar directory as raw .npy files plus a manifest.
+
+    Args:
+        log_file (str): Path to the log the columns were parsed from.
+        schema (str): Identifier of the parser that produced the columns.
+        columns (dict): Maps column names to numpy arrays. Object arrays can not be cached.
+        source (dict, optional): Fingerprint of log_file taken before parsing. Defaults to a fresh fingerprint.
+        kind (str, optional): Which of the sidecars of log_file to write. Defaults to "columns".
+    """
+    cache_dir = cache_path(log_file, kind)
+    os.makedirs(cache_dir, exist_ok=True)
+    old_manifest = _read_manifest(cache_dir)
+
+    token = uuid.uuid4().hex[:8]
+    files = {}
+    for i, (name, col) in enumerate(columns.items()):
+        files[name] = f"{token}_{i}.npy"
+        np.save(os.path.join(cache_dir, files[name]), np.ascontiguousarray(col))
+
+    _write_manifest(
+        cache_dir,
+        {
+            "version": CACHE_VERSION,
+            "schema": schema,
+            "source": source if source is not None else fingerprint(log_file),
+            "columns": files,
+        },
+    )
+
+    # remove columns of the previous cache, readers still holding them keep their mapping
+    if old_manifest is not None:
+        for file_name in old_manifest.get("columns", {}).values():
+            if file_name not in files.values():
+                try:
+                    os.remove(os.path.join(cache_dir, file_name))
+                except OSError:
+                    pass
+
+
+def cached_columns(log_file, schema, parse, kind="columns"):
+    """Returns the parsed columns of log_file, parsing and caching them only if there is no valid sidecar.
+
+    Args:
+        log_file (str): Path to the log.
+        schema (str): Identifier of the parser, a different schema invalidates existing caches.
+        parse (callable): Parses the full log_file and returns a dict of numpy arrays.
+        kind (str, optional): Which of the sidecars of log_file to use. Defaults to "columns".
+
+    Returns:
+        dict: Maps column names to numpy arrays.
+    """
+    columns = load(log_file, schema, kind)
+    if columns is not None:
+        return columns
+
+    source = fingerprint(log_file)
+    columns = parse()
+    try:
+        store(log_file, schema, columns, source, kind)
+    except OSError as e:
+        print(f"Could not cache {log_file}: {e}")
+    return columns
@@ -0,0 +1,331 @@
+import sys, io
+import numpy as np
+
+from classes.TuningConfig import CONFIG_CODE_DTYPE, factorize_rows
+from classes.LogCache import cached_columns, load
+
+# columns of the iteration log which together describe the configuration of an iteration
+CONFIG_COLUMNS = [
+    "Functor",
+    "Interaction Type",
+    "Container",
+    "CellSizeFactor",
+    "Traversal",
+    "Data Layout",
+    "Newton 3",
+    "inTuningPhase",
+]
+
+
+def read_header(log_file):
+    """Returns the column names of a .csv log."""
+    with open(log_file, newline="") as f:
+        return f.readline().rstrip("\r\n").split(",")
+
+
+def build_row_index(log_file, chunk_size=1 << 24):
+    """Scans a .csv log for line breaks to find the byte offset at which each row starts.
+
+    Args:
+        log_file (str): Path to the .csv file.
+        chunk_size (int, optional): Number of bytes to scan at once. Defaults to 16 MiB.
+
+    Returns:
+        np.ndarray: int64 array where entry i is the offset of data row i (the header is skipped) and the last entry
+        is the end of the last row, i.e. it has one entry more than the log has rows.
+    """
+    ends = []
+    pos = 0
+    with open(log_file, "rb") as f:
+        while chunk := f.read(chunk_size):
+            ends.append(
+                np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n")) + pos + 1
+            )
+            pos += len(chunk)
+
+    offsets = np.concatenate(ends) if len(ends) > 0 else np.zeros(0, dtype=np.int64)
+    if len(offsets) == 0 or offsets[-1] != pos:
+        # last row is not terminated by a line break
+        offsets = np.append(offsets, pos)
+    return offsets.astype(np.int64)
+
+
+def read_row_index(log_file):
+    """Returns the row offsets of log_file, building and storing them next to the log only once."""
+    return cached_columns(
+        log_file,
+        "rows",
+        lambda: {"offsets": build_row_index(log_file)},
+        kind="index",
+    )["offsets"]
+
+
+def read_columns(log_file, columns, range_start=0, range_end=sys.maxsize, offsets=None):
+    """Parses the selected columns of a .csv log in a single pass.
+
+    Args:
+        log_file (str): Path to the .csv file.
+        columns (dict): Maps the names of the columns to read to their numpy dtype.
+        range_start (int, optional): First row to read. Defaults to 0.
+        range_end (int, optional): Row after the last row to read. Defaults to sys.maxsize.
+        offsets (np.ndarray, optional): Row offsets as returned by build_row_index. If given, only the bytes of the
+            requested rows are read, otherwise all rows before range_end are scanned. Defaults to None.
+
+    Returns:
+        dict: Maps each column name to a contiguous numpy array of its values.
+    """
+    header = read_header(log_file)
+
+    if offsets is not None:
+        n_rows = len(offsets) - 1
+        start = min(range_start, n_rows)
+        end = max(min(range_end, n_rows), start)
+        if start == end:
+            data = np.empty(0, dtype=list(columns.items()))
+            return {name: data[name].copy() for name in columns}
+        with open(log_file, "rb") as f:
+            f.seek(offsets[start])
+            rows = io.StringIO(f.read(offsets[end] - offsets[start]).decode())
+        range_start, range_end = 0, sys.maxsize
+    else:
+        rows = open(log_file, newline="")
+        rows.readline()
+
+    with rows:
+        data = np.loadtxt(
+            rows,
+            dtype=list(columns.items()),
+            delimiter=",",
+            comments=None,
+            usecols=[header.index(name) for name in columns],
+            skiprows=range_start,
+            max_rows=None if range_end == sys.maxsize else max(range_end - range_start, 0),
+            ndmin=1,
+        )
+    return {name: np.ascontiguousarray(data[name]) for name in columns}
+
+
+def slice_rows(columns, range_start=0, range_end=sys.maxsize):
+    """Restricts all columns to the rows in [range_start, range_end). Columns describing distinct configurations
+    (prefixed with "configs:") are not per row and stay as they are."""
+    return {
+        name: col if name.startswith("configs:") else col[range_start:range_end]
+        for name, col in columns.items()
+    }
+
+
+def read_log(log_file, schema, parse, range_start=0, range_end=sys.maxsize, use_cache=True):
+    """Reads the columns of a log through its sidecar cache.
+
+    A valid columns cache is sliced to the requested rows. Without one, the full log is parsed and cached, unless
+    only a range of rows is requested. Then the row index of the log is used to parse exactly these rows.
+
+    Args:
+        log_file (str): Path to the log.
+        schema (str): Identifier of the parser.
+        parse (callable): Called as parse(range_start, range_end, offsets) and returns a dict of numpy arrays.
+        range_start (int, optional): First row to read. Defaults to 0.
+        range_end (int, optional): Row after the last row to read. Defaults to sys.maxsize.
+        use_cache (bool, optional): Whether to read and write the sidecar cache. Defaults to True.
+
+    Returns:
+        dict: Maps column names to numpy arrays restricted to the selected rows.
+    """
+    if not use_cache:
+        return parse(range_start, range_end, None)
+
+    if range_start == 0 and range_end == sys.maxsize:
+        return cached_columns(log_file, schema, lambda: parse(0, sys.maxsize, None))
+
+    cols = load(log_file, schema)
+    if cols is not None:
+        return slice_rows(cols, range_start, range_end)
+    return parse(range_start, range_end, read_row_index(log_file))
+
+
+def parse_iteration_log(iteration_file, range_start=0, range_end=sys.maxsize, offsets=None):
+    """Parses the iteration log into typed numpy arrays.
+
+    Args:
+        iteration_file (str): Path to the .csv file containing the iteration log of the simulation.
+        range_start (int, optional): First row to read. Defaults to 0.
+        range_end (int, optional): Row after the last row to read. Defaults to sys.maxsize.
+        offsets (np.ndarray, optional): Row offsets of the log to seek to range_start directly. Defaults to None.
+
+    Returns:
+        dict: int64 arrays for "Iteration", "computeInteractionsTotal[ns]" and "rebuildNeighborLists[ns]", a bool array
+        for "inTuningPhase" and a CONFIG_CODE_DTYPE array "config" of codes local to this log. The distinct
+        configurations the codes refer to are given by str arrays "configs:<name>" for the remaining CONFIG_COLUMNS.
+    """
+    columns = {
+        "Iteration": np.int64,
+        "computeInteractionsTotal[ns]": np.int64,
+        "rebuildNeighborLists[ns]": np.int64,
+    }
+    columns.update({name: object for name in CONFIG_COLUMNS})
+    cols = read_columns(iteration_file, columns, range_start, range_end, offsets)
+
+    cols["inTuningPhase"] = np.char.lower(cols["inTuningPhase"].astype(str)) == "true"
+
+    config_cols = [cols.pop(name).astype(str) for name in CONFIG_COLUMNS[:-1]]
+    codes, first = factorize_rows(config_cols)
+    cols["config"] = codes.astype(CONFIG_CODE_DTYPE)
+    for name, col in zip(CONFIG_COLUMNS[:-1], config_cols):
+        cols[f"configs:{name}"] = col[first]
+    return cols
+
+
+def read_iteration_log(
+    iteration_file, range_start=0, range_end=sys.maxsize, use_cache=True
+):
+    """Reads the iteration log, from its sidecar cache if possible.
+
+    Args:
+        iteration_file (str): Path to the .csv file containing the iteration log of the simulation.
+        range_start (int, optional): First row to read. Defaults to 0.
+        range_end (int, optional): Row after the last row to read. Defaults to sys.maxsize.
+        use_cache (bool, optional): Whether to read and write the parsed columns from/to the sidecar cache. Defaults to True.
+
+    Returns:
+        dict: The columns as returned by parse_iteration_log, restricted to the selected rows.
+    """
+    return read_log(
+        iteration_file,
+        "iteration:codes:" + ",".join(CONFIG_COLUMNS),
+        lambda *rows: parse_iteration_log(iteration_file, *rows),
+        range_start,
+        range_end,
+        use_cache,
+    )
+
+
+def parse_liveinfo_log(
+    liveinfo_file, params, range_start=0, range_end=sys.maxsize, offsets=None
+):
+    """Parses the liveinfo log into typed numpy arrays.
+
+    Args:
+        liveinfo_file (str): Path to the .csv file containing the liveinfo log of the simulation.
+        params (list): Names of the liveinfo parameters to read.
+        range_start (int, optional): First row to read. Defaults to 0.
+        range_end (int, optional): Row after the last row to read. Defaults to sys.maxsize.
+        offsets (np.ndarray, optional): Row offsets of the log to seek to range_start directly. Defaults to None.
+
+    Returns:
+        dict: An int64 array for "Iteration" and a float64 array for each parameter in params that could be read.
+    """
+    header = read_header(liveinfo_file)
+    columns = {"Iteration": np.int64}
+    for param_name in params:
+        if param_name in header:
+            columns[param_name] = np.float64
+        else:
+            print(f"Could not read {param_name} statistics")
+
+    return read_columns(liveinfo_file, columns, range_start, range_end, offsets)
+
+
+def read_liveinfo_log(
+    liveinfo_file, params, range_start=0, range_end=sys.maxsize, use_cache=True
+):
+    """Reads the liveinfo log, from its sidecar cache if possible.
+
+    Args:
+        liveinfo_file (str): Path to the .csv file containing the liveinfo log of the simulation.
+        params (list): Names of the liveinfo parameters to read.
+        range_start (int, optional): First row to read. Defaults to 0.
+        range_end (int, optional): Row after the last row to read. Defaults to sys.maxsize.
+        use_cache (bool, optional): Whether to read and write the parsed columns from/to the sidecar cache. Defaults to True.
+
+    Returns:
+        dict: The columns as returned by parse_liveinfo_log, restricted to the selected rows.
+    """
+    return read_log(
+        liveinfo_file,
+        "liveinfo:" + ",".join(params),
+        lambda *rows: parse_liveinfo_log(liveinfo_file, params, *rows),
+        range_start,
+        range_end,
+        use_cache,
+    )
+
+
+# lines of the tuning log which do not hold evidence
+TUNING_LOG_SKIP_PREFIXES = ("liveInfo", "reset", "tune")
+
+# keys of the configuration printed in the tuning log for each of CONFIG_COLUMNS[:-1], None if not printed
+TUNING_LOG_CONFIG_KEYS = {
+    "Functor": None,
+    "Interaction Type": "Interaction Type",
+    "Container": "Container",
+    "CellSizeFactor": "CellSizeFactor",
+    "Traversal": "Traversal",
+    "Data Layout": "Data Layout",
+    "Newton 3": "Newton 3",
+}
+
+
+def parse_tuning_log(tuning_file):
+    """Parses the evidence collected in the tuning log in a single pass.
+
+    Each evidence line has the form "evidence <ns> <iteration> {<configuration>}". Lines are tokenized once and
+    configurations are only split into their fields once per distinct {...} text.
+
+    Args:
+        tuning_file (str): Path to the tuning log of the simulation.
+
+    Returns:
+        dict: int64 arrays for "evidence" and "iteration" and a CONFIG_CODE_DTYPE array "config" of codes local to
+        this log. The distinct configurations are given by str arrays "configs:<name>" for CONFIG_COLUMNS[:-1].
+    """
+    evidence = []
+    iteration = []
+    codes = []
+    body_codes = {}
+
+    with open(tuning_file, newline="") as tfile:
+        for line in tfile:
+            if line.startswith(TUNING_LOG_SKIP_PREFIXES):
+                continue
+            head, _, rest = line.partition("{")
+            if not rest:
+                continue
+            body = rest.partition("}")[0]
+            tokens = head.split()
+
+            code = body_codes.get(body)
+            if code is None:
+                code = body_codes[body] = len(body_codes)
+            evidence.append(int(tokens[1]))
+            iteration.append(int(tokens[2]))
+            codes.append(code)
+
+    cdicts = [dict(item.split(": ", 1) for item in body.split(" , ")) for body in body_codes]
+    cols = {
+        "evidence": np.array(evidence, dtype=np.int64),
+        "iteration": np.array(iteration, dtype=np.int64),
+        "config": np.array(codes, dtype=CONFIG_CODE_DTYPE),
+    }
+    for name, key in TUNING_LOG_CONFIG_KEYS.items():
+        cols[f"configs:{name}"] = np.array(
+            [cdict[key] if key is not None else "LJFunctorAVX" for cdict in cdicts],
+            dtype=str,
+        )
+    return cols
+
+
+def read_tuning_log(tuning_file, use_cache=True):
+    """Reads the tuning log, from its sidecar cache if possible.
+
+    Args:
+        tuning_file (str): Path to the tuning log of the simulation.
+        use_cache (bool, optional): Whether to read and write the parsed columns from/to the sidecar cache. Defaults to True.
+
+    Returns:
+        dict: The columns as returned by parse_tuning_log.
+    """
+    if not use_cache:
+        return parse_tuning_log(tuning_file)
+    return cached_columns(
+        tuning_file, "tuning:codes", lambda: parse_tuning_log(tuning_file)
+    )
@@ -0,0 +1,228 @@
+import csv, os, re, sys, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from classes.LogReader import read_iteration_log
+from classes.TriggerReplay import replay_triggers
+
+RANK_LOG_PATTERN = re.compile(r"iterationLog_Rank(\d+)\.csv$")
+
+
+def rank_ids(abs_path):
+    """Returns the sorted ranks of which abs_path contains an iteration log."""
+    ranks = [
+        int(m.group(1)) for f in os.listdir(abs_path) if (m := RANK_LOG_PATTERN.match(f))
+    ]
+    return sorted(ranks)
+
+
+def _read_rank(iteration_file, range_start, range_end, use_cache):
+    """Reads the columns of a rank needed for the aggregation, copied out of the cache to send them between
+    processes."""
+    log = read_iteration_log(iteration_file, range_start, range_end, use_cache)
+    return {
+        name: np.array(log[name])
+        for name in [
+            "Iteration",
+            "computeInteractionsTotal[ns]",
+            "rebuildNeighborLists[ns]",
+            "inTuningPhase",
+        ]
+    }
+
+
+def align_ranks(logs):
+    """Aligns the logs of several ranks by iteration.
+
+    Only iterations logged by all ranks are kept, e.g. a rank killed by the time limit shortens all of them. Should
+    a rank log an iteration more than once, its first row is used.
+
+    Args:
+        logs (list): Columns of each rank as returned by read_iteration_log.
+
+    Returns:
+        tuple: The common iterations and the rows of each rank holding them, a (ranks, iterations) array.
+    """
+    firsts = [np.unique(log["Iteration"], return_index=True) for log in logs]
+    iteration = firsts[0][0]
+    for its, _ in firsts[1:]:
+        iteration = np.intersect1d(iteration, its, assume_unique=True)
+    rows = np.stack([first[np.searchsorted(its, iteration)] for its, first in firsts])
+    return iteration, rows
+
+
+class MultiRankRun:
+    """The iteration logs of all MPI ranks of a job, aligned by iteration.
+
+    Each attribute holding per-iteration data is a (ranks, iterations) array whose row r belongs to ranks[r]. As all
+    ranks wait for each other every iteration, the slowest rank of an iteration determines the wall time, i.e. the
+    job's runtime follows the critical path, the maximum over all ranks.
+
+    Args:
+        job_name (str): Name of the job directory.
+        abs_path (str): Path of the job directory.
+        ranks (list, optional): Ranks to load. Defaults to all ranks with an iteration log in abs_path.
+        range_start (int, optional): First row of the logs to read. Defaults to 0.
+        range_end (int, optional): Row after the last row of the logs to read. Defaults to sys.maxsize.
+        workers (int, optional): Number of processes reading the logs, 1 reads them in this process. Defaults to 1.
+        use_cache (bool, optional): Whether to use the sidecar cache of the logs. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        job_name,
+        abs_path,
+        ranks=None,
+        range_start=0,
+        range_end=sys.maxsize,
+        workers=1,
+        use_cache=True,
+    ):
+        self.job_name = job_name
+        self.ranks = np.array(rank_ids(abs_path) if ranks is None else ranks, dtype=np.int64)
+        if len(self.ranks) == 0:
+            raise FileNotFoundError(f"No iteration logs in {abs_path}")
+
+        files = [os.path.join(abs_path, f"iterationLog_Rank{rank}.csv") for rank in self.ranks]
+        args = [(f, range_start, range_end, use_cache) for f in files]
+        if workers == 1 or len(files) == 1:
+            logs = [_read_rank(*arg) for arg in args]
+        else:
+            # spawn fresh interpreters so workers do not inherit pyplot state of this process
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(files)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                logs = list(pool.map(_read_rank, *zip(*args)))
+
+        self.iteration, rows = align_ranks(logs)
+        stack = lambda name: np.stack([log[name][r] for log, r in zip(logs, rows)])
+        self.total = stack("computeInteractionsTotal[ns]")
+        self.rebuildtime = stack("rebuildNeighborLists[ns]")
+        self.runtime = self.total - self.rebuildtime
+        self.tune = stack("inTuningPhase")
+
+    @property
+    def critical_path(self):
+        """Wall time of each iteration, the total time of the slowest rank."""
+        return self.total.max(axis=0)
+
+    @property
+    def critical_rank(self):
+        """Rank determining the wall time of each iteration."""
+        return self.ranks[self.total.argmax(axis=0)]
+
+    @property
+    def imbalance(self):
+        """Load imbalance of each iteration, the time of the slowest rank relative to the mean over all ranks."""
+        return self.total.max(axis=0) / np.maximum(self.total.mean(axis=0), 1)
+
+    def tuning_starts(self):
+        """Returns the first iteration of each tuning phase of each rank as dict rank -> np.ndarray."""
+        edges = np.diff(self.tune.astype(np.int8), axis=1, prepend=0) == 1
+        return {
+            int(rank): self.iteration[np.flatnonzero(starts)]
+            for rank, starts in zip(self.ranks, edges)
+        }
+
+    def trigger_lags(self, max_gap=1000):
+        """Finds how far behind the first rank each rank starts its tuning phases.
+
+        Tuning phases of all ranks starting at most max_gap iterations after each other form one tuning event.
+
+        Args:
+            max_gap (int, optional): Maximum distance of the phases of one event. Defaults to 1000.
+
+        Returns:
+            tuple: Start of each event and dict rank -> (lag of each tuning phase behind its event, number of events
+            the rank did not tune in).
+        """
+        starts = self.tuning_starts()
+        merged = np.sort(np.concatenate(list(starts.values())))
+        events = merged[np.concatenate(([True], np.diff(merged) > max_gap))] if len(merged) > 0 else merged
+        lags = {}
+        for rank, its in starts.items():
+            event = np.searchsorted(events, its, side="right") - 1
+            lags[rank] = (its - events[event], len(events) - len(np.unique(event)))
+        return events, lags
+
+    def replay_triggers(self, trigger_type, trigger_factor, trigger_n_samples, tuning_its=None):
+        """Replays a trigger on each rank and on the critical path.
+
+        On the critical path an iteration counts as tuning iteration if any rank was tuning.
+
+        Args:
+            trigger_type (str): One of TriggerReplay.TRIGGER_TYPES.
+            trigger_factor (float): The trigger factor lambda.
+            trigger_n_samples (int): The number of samples n.
+            tuning_its (int, optional): Length of a simulated tuning phase, see TriggerReplay.select_triggers.
+
+        Returns:
+            dict: Maps each rank and "critical" to the iterations the trigger fires in.
+        """
+        setting = (trigger_type, trigger_factor, trigger_n_samples, tuning_its)
+        triggers = {
+            int(rank): self.iteration[replay_triggers(runtime, tune, *setting)]
+            for rank, runtime, tune in zip(self.ranks, self.runtime, self.tune)
+        }
+        # runtime excluding rebuilds of the rank on the critical path, i.e. the slowest rank of each iteration
+        slowest = self.total.argmax(axis=0)[np.newaxis]
+        critical = np.take_along_axis(self.runtime, slowest, axis=0)[0]
+        triggers["critical"] = self.iteration[replay_triggers(critical, self.tune.any(axis=0), *setting)]
+        return triggers
+
+    def write_rank_summary(self, outfile, max_gap=1000):
+        """Writes runtime, share of the critical path and tuning lag of each rank to outfile.csv.
+
+        The imbalance of a rank is its total runtime relative to the mean over all ranks. The last row describes the
+        critical path, i.e. what the job actually took, with the total imbalance of the job.
+
+        Args:
+            outfile (str): Path of the output without extension.
+            max_gap (int, optional): Maximum distance of the phases of one tuning event, see trigger_lags.
+        """
+        print(f"Writing rank summary of {self.job_name}")
+        critical = self.critical_rank
+        totals = self.total.sum(axis=1)
+        mean_total = totals.mean()
+        events, lags = self.trigger_lags(max_gap)
+        with open(f"{outfile}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                [
+                    "rank",
+                    "total_runtime",
+                    "imbalance",
+                    "critical_its",
+                    "tuning_phases",
+                    "tuning_its",
+                    "missed_events",
+                    "mean_lag",
+                ]
+            )
+            for rank, total, tune in zip(self.ranks.tolist(), totals, self.tune):
+                lag, missed = lags[rank]
+                writer.writerow(
+                    [
+                        rank,
+                        int(total),
+                        round(total / mean_total, 3),
+                        int((critical == rank).sum()),
+                        len(lag),
+                        int(tune.sum()),
+                        missed,
+                        round(lag.mean(), 1) if len(lag) > 0 else -1,
+                    ]
+                )
+            writer.writerow(
+                [
+                    "critical",
+                    int(self.critical_path.sum()),
+                    round(self.critical_path.sum() / mean_total, 3),
+                    len(self.iteration),
+                    len(events),
+                    int(self.tune.any(axis=0).sum()),
+                    0,
+                    -1,
+                ]
+            )
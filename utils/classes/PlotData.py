@@ -1,50 +1,32 @@
-import csv, sys, random, re, bisect, ast
+import csv, os, sys, random, heapq, ast
 import numpy as np
 
-
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-from matplotlib.lines import Line2D
-from matplotlib.transforms import Bbox
-from matplotlib.ticker import ScalarFormatter
-from matplot2tikz import save as tikzsave
-
-from classes.Config import PLOT_DATA_DIR
-from classes.TuningConfig import TuningConfig
-
-# https://tex.stackexchange.com/a/391078
-pgf_with_latex = {
-    "pgf.texsystem": "pdflatex",
-    "text.usetex": True,
-    "font.family": "serif",
-    "font.serif": [],
-    "font.sans-serif": [],  # onherit fonts
-    "font.monospace": [],
-    "axes.labelsize": 24,  # default 10pt
-    "font.size": 18,
-    "legend.fontsize": 18,  # default 8pt
-    "xtick.labelsize": 18,  # default 8pt
-    "ytick.labelsize": 18,
-}
-mpl.rcParams.update(pgf_with_latex)
-
-
-# mpl.use("Agg")
-
-# format y axis in plots as 10^x
-exp_formatter = ScalarFormatter(useMathText=True)
-exp_formatter.set_scientific(True)
-exp_formatter.set_powerlimits((0, 0))
-
-plot_width = 172 / 72
-plot_height = plot_width / 1.62
-
+from classes.Config import PLOT_DATA_DIR, CONFIG_DIR
+from classes.TuningConfig import ConfigTable
+from classes.Segments import (
+    config_segments,
+    segment_configs,
+    segment_rows,
+    tuning_phases,
+    NO_CONFIG,
+    reduce_by_key,
+)
+from classes.ChangePoints import change_points, paying_change_points, match_triggers
+from classes.TriggerReplay import replay_feature_triggers
+from classes.JitterFilter import thermostat_config, thermostat_interval
+from classes.Decimation import minmax_decimate
+from classes.LogReader import (
+    CONFIG_COLUMNS,
+    read_iteration_log,
+    read_liveinfo_log,
+    read_tuning_log,
+)
+
+# matplotlib and the figure style in classes.PlotStyle are imported by the plot methods only, so that analysing the
+# logs without plotting starts fast
 
 random.seed(12345)
 
-axis_cols = list(mcolors.TABLEAU_COLORS.values())
-
 # AVAIL_COLS = list(mcolors.TABLEAU_COLORS.values())
 AVAIL_COLS = ["tab:blue", "tab:purple", "tab:red", "tab:orange", "tab:green"]
 AVAIL_COLS.reverse()
@@ -74,26 +56,20 @@ LIVEINFO_PARAMS = [
 ]
 
 
-def remove_tuning_its(elems, tune):
-    if len(elems) != len(tune):
-        print(
-            "Found length difference in remove_tuning_its. Data seems to be corrupted."
-        )
-    return [el for i, el in enumerate(elems) if not tune[i]]
-
-
-# as in https://stackoverflow.com/a/44971177
-def set_size(w, h, ax=None):
-    """w, h: width, height in inches"""
-    if not ax:
-        ax = plt.gca()
-    l = ax.figure.subplotpars.left
-    r = ax.figure.subplotpars.right
-    t = ax.figure.subplotpars.top
-    b = ax.figure.subplotpars.bottom
-    figw = float(w) / (r - l)
-    figh = float(h) / (t - b)
-    ax.figure.set_size_inches(figw, figh)
+def remove_tuning_its(columns, tune):
+    """Filters the tuning iterations out of all columns (dict of equally long arrays) with a single mask."""
+    keep = ~np.asarray(tune, dtype=bool)
+    filtered = {}
+    for name, col in columns.items():
+        if len(col) != len(keep):
+            print(
+                "Found length difference in remove_tuning_its. Data seems to be corrupted."
+            )
+            n = min(len(col), len(keep))
+            filtered[name] = col[:n][keep[:n]]
+        else:
+            filtered[name] = col[keep]
+    return filtered
 
 
 scenario_name_map = {
@@ -108,6 +84,28 @@ scenario_iterations = {
     "heating-sphere": 60000,
 }
 
+# selector strategy configured in the scenario templates
+scenario_selector_strategies = {
+    "equilibrium": "fastest-absolute-value",
+    "exploding-liquid": "fastest-mean-value",
+    "heating-sphere": "fastest-mean-value",
+}
+
+# how a selector strategy reduces the samples of a config
+selector_reductions = {
+    "fastest-absolute-value": "min",
+    "fastest-mean-value": "mean",
+    "fastest-median-value": "median",
+}
+
+# (param, trigger type, threshold, n_samples) of liveinfo triggers to prototype, see TriggerReplay.feature_conditions
+LIVEINFO_TRIGGER_CANDIDATES = [
+    ("maxDensity", "RelativeChange", 0.1, 500),
+    ("homogeneity", "RelativeChange", 0.1, 500),
+    ("particlesPerCellStdDev", "SplitChange", 0.1, 1000),
+    ("estimatedNumNeighborInteractions", "SplitChange", 0.05, 1000),
+]
+
 liveinfo_param_map = {
     "avgParticlesPerCell": "Avg. Number of Particles per Cell",
     "estimatedNumNeighborInteractions": "Est. Number of Neighbor Interactions",
@@ -142,6 +140,11 @@ class PlotData:
             iteration_log (str): Path to the .csv file containing the iteration log of the simulation.
             range_start (int): Start of iteration range to plot.
             range_end (int): End of iteration range to plot.
+            use_cache (bool): Whether to keep the parsed logs in a memory-mapped sidecar cache next to the logs.
+            jitter_filter (JitterFilter): Filter replacing runtimes distorted by OS noise or the thermostat by their
+                running median in all analyses, None to keep the raw runtimes.
+            decimate (bool): Whether scatter plots only draw the points visible at the resolution of the png output,
+                see Decimation.minmax_decimate.
     """
 
     def __init__(
@@ -153,118 +156,136 @@ class PlotData:
         rank,
         range_start=0,
         range_end=sys.maxsize,
+        use_cache=True,
+        jitter_filter=None,
+        decimate=False,
     ):
         self.job_name = job_name
+        self.decimate = decimate
         self.rank = rank
         self.config_col_map = {}
         self.avail_cols = AVAIL_COLS[:]
         self.xmin = range_start
         self.xmax = range_end
 
-        with open(liveinfo_file, newline="") as lfile, open(
-            iteration_file, newline=""
-        ) as ifile, open(tuning_file, newline="") as tfile:
-            lreader = csv.DictReader(lfile, delimiter=",")
-            lrows = list(lreader)[range_start:range_end]
-
-            ireader = csv.DictReader(ifile, delimiter=",")
-            irows = list(ireader)[range_start:range_end]
-
-            self.iteration = [int(row["Iteration"]) for row in lrows]
-            self.runtime = [
-                int(row["computeInteractionsTotal[ns]"])
-                - int(row["rebuildNeighborLists[ns]"])
-                for row in irows
-            ]
-            self.rebuildtime = [int(row["rebuildNeighborLists[ns]"]) for row in irows]
-            self.tune = [row["inTuningPhase"].lower() in ["true"] for row in irows]
-
-            self.configs = [
-                TuningConfig.from_strs(
-                    row["Functor"],
-                    row["Interaction Type"],
-                    row["Container"],
-                    row["CellSizeFactor"],
-                    row["Traversal"],
-                    row["Data Layout"],
-                    row["Newton 3"],
-                    row["inTuningPhase"],
-                )
-                for row in irows
-            ]
-
-            self.first_tuning_its = []
-            for i, cfg in enumerate(self.configs):
-                if i == 0:
-                    if self.configs[i].tuning:
-                        self.first_tuning_its += [i]
-                    continue
-                if cfg.tuning and not self.configs[i - 1].tuning:
-                    self.first_tuning_its += [i]
-
-            # throw out runtimes of tuning iterations
-            self.iteration = remove_tuning_its(self.iteration, self.tune)
-            self.rebuildtime = remove_tuning_its(self.rebuildtime, self.tune)
-            self.runtime = remove_tuning_its(self.runtime, self.tune)
-            self.configs = remove_tuning_its(self.configs, self.tune)
-            self.stringified_configs = [str(cfg) for cfg in self.configs]
-
-            # read in all liveinfo params we may plot later on
-            self.liveinfo = {}
-            for liveinfo_param_name in LIVEINFO_PARAMS:
-                try:
-                    self.liveinfo[liveinfo_param_name] = [
-                        float(row[liveinfo_param_name]) for row in lrows
-                    ]
-                    self.liveinfo[liveinfo_param_name] = remove_tuning_its(
-                        self.liveinfo[liveinfo_param_name], self.tune
-                    )
-                except:
-                    print(f"Could not read {liveinfo_param_name} statistics")
+        iteration_log = read_iteration_log(
+            iteration_file, range_start, range_end, use_cache
+        )
+        liveinfo_log = read_liveinfo_log(
+            liveinfo_file, LIVEINFO_PARAMS, range_start, range_end, use_cache
+        )
 
-            # set scenario for scenario-specific settings
-            self.scenario = job_name.split("_")[0]
-            
-            if not "n3l" in job_name:
-                self.plot_title = generate_plot_title(job_name, self.rank)
-            else:
-                self.plot_title=scenario_name_map[self.scenario]
-
-            # read in selected configurations
-            trows = [
-                row
-                for row in tfile
-                if not row.startswith(("liveInfo", "reset", "tune"))
-            ]
-            tdicts = []
-            for row in trows:
-                parts = re.findall(r"{[^}]*}|\S+", row)
-                # print(parts)
-                # d = dict(zip(parts[::2], parts[1::2]))
-                cdict = dict(
-                    item.split(": ", 1) for item in parts[3].strip("{}").split(" , ")
-                )
-                cstr = str(
-                    TuningConfig.from_strs(
-                        functor="LJFunctorAVX",
-                        interaction=cdict["Interaction Type"],
-                        container=cdict["Container"],
-                        csf=cdict["CellSizeFactor"],
-                        traversal=cdict["Traversal"],
-                        layout=cdict["Data Layout"],
-                        n3=cdict["Newton 3"],
-                        tuning="true",
-                    )
-                )
-                d = {
-                    "evidence": int(parts[1]),
-                    "iteration": int(parts[2]),
-                    "configuration": cstr,
-                }
-                tdicts.append(d)
+        self.tune = iteration_log["inTuningPhase"]
+
+        # intern the distinct configurations of this run, iterations only keep their codes
+        self.config_table = ConfigTable()
+        local_codes = self.config_table.encode(
+            [iteration_log[f"configs:{name}"] for name in CONFIG_COLUMNS[:-1]]
+        )
+        config_codes = local_codes[iteration_log["config"]]
+
+        # tuning phases and segments of constant config, shared by all plots and analyses
+        self.phases = tuning_phases(
+            iteration_log["Iteration"],
+            iteration_log["computeInteractionsTotal[ns]"],
+            config_codes,
+            self.tune,
+        )
+        self.first_tuning_its = self.phases["first_row"].tolist()
+        self.segments = config_segments(
+            iteration_log["Iteration"], config_codes, self.tune
+        )
 
-            self.tuning_evidence = tdicts
-            self.tuning_results = None
+        # runtime and liveinfo of every row of the logs, kept for replaying triggers on this run
+        self.raw_iteration = iteration_log["Iteration"]
+        self.raw_runtime = (
+            iteration_log["computeInteractionsTotal[ns]"]
+            - iteration_log["rebuildNeighborLists[ns]"]
+        )
+        self.raw_rebuildtime = iteration_log["rebuildNeighborLists[ns]"]
+        self.raw_liveinfo = {
+            name: liveinfo_log[name] for name in LIVEINFO_PARAMS if name in liveinfo_log
+        }
+
+        # throw out all tuning iterations in a single pass over all columns
+        columns = {
+            "iteration": liveinfo_log["Iteration"],
+            "runtime": self.raw_runtime,
+            "rebuildtime": iteration_log["rebuildNeighborLists[ns]"],
+            "config_codes": config_codes,
+        }
+        # liveinfo params we may plot later on
+        columns.update(
+            {f"liveinfo:{name}": col for name, col in self.raw_liveinfo.items()}
+        )
+        columns = remove_tuning_its(columns, self.tune)
+
+        self.iteration = columns.pop("iteration")
+        self.runtime = columns.pop("runtime")
+        self.rebuildtime = columns.pop("rebuildtime")
+        self.config_codes = columns.pop("config_codes")
+        self.liveinfo = {
+            name.removeprefix("liveinfo:"): col for name, col in columns.items()
+        }
+
+        # set scenario for scenario-specific settings
+        self.scenario = job_name.split("_")[0]
+
+        # non-tuning iterations whose runtime was replaced by the jitter filter
+        self.jitter = np.zeros(len(self.runtime), dtype=bool)
+        if jitter_filter is not None:
+            self.filter_jitter(jitter_filter, os.path.dirname(iteration_file))
+        
+        if not "n3l" in job_name:
+            self.plot_title = generate_plot_title(job_name, self.rank)
+        else:
+            self.plot_title=scenario_name_map[self.scenario]
+
+        # read in selected configurations
+        tuning_log = read_tuning_log(tuning_file, use_cache)
+        local_codes = self.config_table.encode(
+            [tuning_log[f"configs:{name}"] for name in CONFIG_COLUMNS[:-1]]
+        )
+        self.tuning_evidence = {
+            "evidence": tuning_log["evidence"],
+            "iteration": tuning_log["iteration"],
+            "config": local_codes[tuning_log["config"]],
+        }
+        self.tuning_results = None
+
+    def filter_jitter(self, jitter_filter, job_path):
+        """Replaces the runtimes of iterations distorted by OS noise or the thermostat by their running median.
+
+        The filter runs on the non-tuning iterations, separately between tuning phases since the config may change
+        at each of them. The thermostat interval is taken from the config.yaml of the job, or from the default.yaml
+        of the scenario in CONFIG_DIR if the job directory has none.
+
+        Args:
+            jitter_filter (JitterFilter): The filter to apply.
+            job_path (str): Directory containing the logs of the job.
+        """
+        interval = thermostat_interval(thermostat_config(job_path, self.scenario, CONFIG_DIR))
+
+        # position of each tuning phase in the non-tuning iterations
+        breaks = np.cumsum(~self.tune)[self.phases["first_row"]]
+        mask, median = jitter_filter.mask(self.runtime, self.iteration, breaks, interval)
+        self.runtime = jitter_filter.apply(self.runtime, mask, median)
+        self.raw_runtime = self.raw_runtime.copy()
+        self.raw_runtime[np.flatnonzero(~self.tune)] = self.runtime
+        self.jitter = mask
+
+        print(f"Filtered {mask.sum()} of {len(mask)} iterations of {self.job_name}")
+
+    @property
+    def configs(self):
+        """The interned TuningConfig of each non-tuning iteration."""
+        return [self.config_table[code] for code in self.config_codes.tolist()]
+
+    @property
+    def stringified_configs(self):
+        """The string of the config of each non-tuning iteration, shared between iterations with the same config."""
+        strs = self.config_table.strs
+        return [strs[code] for code in self.config_codes.tolist()]
 
     def __enter__(self):
         return self
@@ -272,6 +293,25 @@ class PlotData:
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
 
+    def plot_rows(self, values, rows=None):
+        """Selects the non-tuning iterations to draw of a series.
+
+        Args:
+            values (np.ndarray): The series, one value per non-tuning iteration.
+            rows (np.ndarray, optional): Sorted candidate iterations, e.g. those of a single config. Defaults to all.
+
+        Returns:
+            np.ndarray: Sorted indices of the iterations to draw.
+        """
+        if rows is None:
+            rows = np.arange(len(values))
+        if not self.decimate:
+            return rows
+        # keep the boundaries of the config segments
+        pos = np.searchsorted(rows, self.segments["first"])
+        breaks = pos[(pos < len(rows)) & (rows[np.minimum(pos, len(rows) - 1)] == self.segments["first"])]
+        return rows[minmax_decimate(self.iteration[rows], values[rows], breaks=breaks)]
+
     def map_cfg_to_col(self, config):
         if config in self.config_col_map.keys():
             return self.config_col_map[config]
@@ -298,6 +338,10 @@ class PlotData:
             mark_configs (bool, optional): Whether data points in different unique configs should be plotted in different colors. Defaults to True.
         """
 
+        import matplotlib.pyplot as plt
+        from matplotlib.transforms import Bbox
+        from classes.PlotStyle import axis_cols, exp_formatter, new_figure, save_figure, set_size
+
         # scenario_ylims = {
         #     "equilibrium": 800000,
         #     "exploding-liquid": 1000000,
@@ -306,7 +350,7 @@ class PlotData:
 
         for param_name in param_names:
             print(f"Plotting liveInfo for {param_name}")
-            fig, ax = plt.subplots()
+            fig, ax = new_figure()
             ax.yaxis.set_major_formatter(exp_formatter)
             
             if param_name == "maxDensity":
@@ -314,24 +358,24 @@ class PlotData:
                 ax.set_yticks([0.0075, 0.0175, 0.0275, 0.0375, 0.0475])
 
             if mark_configs:
-                for unique_config in set(self.stringified_configs):
-                    mask = [
-                        i
-                        for i, c in enumerate(self.stringified_configs)
-                        if c == unique_config
-                    ]
+                for code in segment_configs(self.segments):
+                    rows = self.plot_rows(
+                        self.liveinfo[param_name],
+                        segment_rows(self.segments[self.segments["config"] == code]),
+                    )
                     ax.scatter(
-                        [self.iteration[i] for i in mask],
-                        [self.liveinfo[param_name][i] for i in mask],
+                        self.iteration[rows],
+                        self.liveinfo[param_name][rows],
                         marker="x",
                         s=10,
-                        color=self.map_cfg_to_col(unique_config),
+                        color=self.map_cfg_to_col(self.config_table.strs[code]),
                         rasterized=True,
                     )
             else:
+                rows = self.plot_rows(self.liveinfo[param_name])
                 ax.scatter(
-                    self.iteration,
-                    self.liveinfo[param_name],
+                    self.iteration[rows],
+                    self.liveinfo[param_name][rows],
                     marker=".",
                     color=axis_cols[0],
                     s=10,
@@ -341,8 +385,8 @@ class PlotData:
             
 
             set_size(6.4, 4.8, ax)
-            fig.canvas.draw()
-            bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+            # laying out the figure computes the same extents a full draw would
+            bbox = fig.get_tightbbox()
             bbox = Bbox.from_extents( bbox.x0 - 0.6, bbox.y0 - 1.75, bbox.x1 + 0.6, bbox.y1 + 0.5)
             # print(f"liveinfo bbox: x0={bbox.x0}, y0={bbox.y0}, x1={bbox.x1}, y1={bbox.y1}")
             # fig.set_layout_engine("none")
@@ -352,13 +396,7 @@ class PlotData:
                 f"{scenario_name_map[self.scenario]}",
                 loc="center",
             )
-            fig.savefig(f"{output_prefix}{param_name}.png", dpi=300, bbox_inches=bbox)
-            fig.savefig(
-                f"{output_prefix}{param_name}.pdf",
-                format="pdf",
-                dpi=150,
-                bbox_inches=bbox,
-            )
+            save_figure(fig, f"{output_prefix}{param_name}", bbox)
             plt.close(fig)
 
     def plot_iteration_runtime(
@@ -375,6 +413,12 @@ class PlotData:
             mark_tuning_phases (bool, optional): Whether to draw a vertical line at the beginning of a tuning phase. Defaults to True.
         """
 
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import PolyCollection
+        from matplotlib.lines import Line2D
+        from matplotlib.transforms import Bbox
+        from classes.PlotStyle import axis_cols, exp_formatter, new_figure, save_figure, set_size
+
         print(f"Plotting runtime vs. iteration")
 
         scenario_ylims = {
@@ -383,39 +427,33 @@ class PlotData:
             "heating-sphere": 22000000,
         }
 
-        fig, ax = plt.subplots()
+        fig, ax = new_figure()
         ax.yaxis.set_major_formatter(exp_formatter)
         ax.set_ylim(top=scenario_ylims[self.scenario])
 
         # mark distinct configurations
-        
-        def get_config_segments(arr):
-            arr = np.array(arr)
-            breaks = np.where(np.diff(arr)!=1)[0]+1
-            indices = np.split(np.arange(len(arr)), breaks)
-            return [[i[0], i[-1]] for i in indices]
-        
-        # for seg in get_config_segments(np.array(self.iteration)):
-        #     print(f"Config at {seg[0]} is {self.stringified_configs[seg[0]]}")
-        
-        
+        custom_lines = []
+        custom_descriptors = []
         if mark_configs:
-            custom_lines = []
-            custom_descriptors = []
-            for unique_config in set(self.stringified_configs):
-                mask = np.array(
-                    [cfg == unique_config for cfg in self.stringified_configs]
+            # one band per segment, all of them drawn as a single collection
+            codes = segment_configs(self.segments)
+            colors = {
+                code: self.map_cfg_to_col(self.config_table.strs[code]) for code in codes
+            }
+            top = scenario_ylims[self.scenario]
+            x = np.stack([self.segments["start"], self.segments["end"]], axis=1)[:, [0, 1, 1, 0]]
+            y = np.broadcast_to([0, 0, top, top], x.shape)
+            ax.add_collection(
+                PolyCollection(
+                    np.stack([x, y], axis=2),
+                    facecolors=[colors[code] for code in self.segments["config"].tolist()],
+                    alpha=0.5,
                 )
-                true_idx = np.where(mask)[0]
-                iterations = np.array(self.iteration)
-                gaps = np.where(np.diff(iterations[true_idx]) != 1)[0] + 1
-                for seg in np.split(true_idx, gaps):
-                    ax.fill_between(
-                        iterations[seg],
-                        scenario_ylims[self.scenario],
-                        facecolor=self.map_cfg_to_col(unique_config),
-                        alpha=0.5,
-                    )
+            )
+            ax.autoscale_view()
+
+            for code in codes:
+                unique_config = self.config_table.strs[code]
                 custom_lines = [
                     Line2D(
                         [0],
@@ -454,9 +492,10 @@ class PlotData:
                 )
 
         # plot iteration runtimes
+        rows = self.plot_rows(self.runtime)
         ax.scatter(
-            self.iteration,
-            self.runtime,
+            self.iteration[rows],
+            self.runtime[rows],
             s=0.25,
             color=axis_cols[0],
             rasterized=True,
@@ -469,8 +508,7 @@ class PlotData:
         # fig.canvas.draw()
         # leg.set_in_layout(True)
         # fig.set_layout_engine('none')
-        fig.canvas.draw()
-        bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+        bbox = fig.get_tightbbox()
         bbox = Bbox.from_extents(
             bbox.x0 - 0.6, bbox.y0 - 1.75, bbox.x1 + 0.6, bbox.y1 + 0.5
         )
@@ -486,8 +524,7 @@ class PlotData:
 
         # fig.subplots_adjust(bottom=0.2)
         # fig.set_size_inches(6.4, 5.5)
-        fig.savefig(f"{output_prefix}.png", dpi=300, bbox_inches=bbox)
-        fig.savefig(f"{output_prefix}.pdf", format="pdf", dpi=150, bbox_inches=bbox)
+        save_figure(fig, output_prefix, bbox)
         plt.close(fig)
 
     def plot_rebuild_times(
@@ -502,6 +539,10 @@ class PlotData:
             x_end (int, optional): End of x axis, -1 means full range. Defaults to -1.
         """
 
+        import matplotlib.pyplot as plt
+        from matplotlib.lines import Line2D
+        from classes.PlotStyle import axis_cols, exp_formatter, new_figure, save_figure
+
         print(f"Plotting rebuild times")
 
         scenario_ylims = {
@@ -509,7 +550,7 @@ class PlotData:
             "exploding-liquid": 1000000,
             "heating-sphere": 8000000,
         }
-        fig, ax = plt.subplots(layout="constrained")
+        fig, ax = new_figure(layout="constrained")
         ax.yaxis.set_major_formatter(exp_formatter)
         ax.set_ylim(top=scenario_ylims[self.scenario])
         ax.grid(visible=False)
@@ -517,18 +558,20 @@ class PlotData:
         beta = np.polyfit(self.iteration, self.runtime, 1)
         reg_fun = np.poly1d(beta)
 
+        rows = self.plot_rows(self.runtime)
         ax.scatter(
-            self.iteration,
-            self.runtime,
+            self.iteration[rows],
+            self.runtime[rows],
             s=0.25,
             color=axis_cols[0],
             marker=".",
             rasterized=True,
         )
 
+        rows = self.plot_rows(self.rebuildtime)
         ax.scatter(
-            self.iteration,
-            self.rebuildtime,
+            self.iteration[rows],
+            self.rebuildtime[rows],
             s=0.25,
             color=axis_cols[1],
             marker="^",
@@ -576,100 +619,136 @@ class PlotData:
             handlelength=0.5,
         )
         fig.set_size_inches(6.4, 6.0)
-        fig.savefig(f"{output_prefix}.png", dpi=300, bbox_inches="tight")
-        fig.savefig(
-            f"{output_prefix}.pdf",
-            format="pdf",
-            dpi=150,
-            bbox_inches="tight",
-            pad_inches=0,
-        )
+        save_figure(fig, output_prefix, "tight", pad_inches=0)
         plt.close(fig)
 
-    def gather_tuning_results(self):
+    def reduce_phase_evidence(self, selector_strategy=None):
+        """Reduces the evidence of each config within each tuning phase to a single value.
+
+        Evidence is attributed to the tuning phase (as found in the iteration log) containing its iteration. The
+        samples of each config in a phase are reduced like the selector strategy of AutoPas does.
+
+        Args:
+            selector_strategy (str, optional): AutoPas selector strategy used to reduce the samples of a config.
+                Defaults to the strategy configured for the scenario.
+
+        Returns:
+            tuple: Phase index, config code and reduced evidence in ns, sorted by phase and config.
+        """
+        if selector_strategy is None:
+            selector_strategy = scenario_selector_strategies.get(
+                self.scenario, "fastest-mean-value"
+            )
+        reduction = selector_reductions[selector_strategy.lower()]
+
+        evidence = self.tuning_evidence["evidence"]
+        iterations = self.tuning_evidence["iteration"]
+        phase_idx = np.searchsorted(self.phases["start"], iterations, side="right") - 1
+        valid = phase_idx >= 0
+        valid[valid] &= iterations[valid] <= self.phases["end"][phase_idx[valid]] + 1
+
+        n_configs = max(len(self.config_table), 1)
+        keys, values = reduce_by_key(
+            phase_idx[valid] * n_configs + self.tuning_evidence["config"][valid],
+            evidence[valid],
+            reduction,
+        )
+        return keys // n_configs, keys % n_configs, values
+
+    def gather_tuning_results(self, k=10, selector_strategy=None):
+        """Ranks the configs tested in each tuning phase.
+
+        The evidence of each config in a phase is reduced by reduce_phase_evidence, and a bounded heap keeps the k
+        fastest configs per phase.
+
+        Args:
+            k (int, optional): Number of configs to keep per phase. Defaults to 10.
+            selector_strategy (str, optional): AutoPas selector strategy used to reduce the samples of a config.
+                Defaults to the strategy configured for the scenario.
+        """
         print(f"Gathering tuning phase results")
 
-        n_samples = 10
-        results = []
+        starts = self.phases["start"]
+        key_phases, key_configs, values = self.reduce_phase_evidence(selector_strategy)
+        bounds = np.searchsorted(key_phases, np.arange(len(starts) + 1))
 
-        last_phase_start = 0
-        last_sample_iteration = 0
-        ranking = []
-
-        for d in self.tuning_evidence:
-            if d["iteration"] > last_sample_iteration + n_samples:
-                # write back data from old phase, truncating to the top 10 configs
-                ranking = ranking[0:10]
-                results.append(
-                    {
-                        "start": last_phase_start,
-                        "end": d["iteration"] - 1,
-                        "ranking": ranking,
-                    }
-                )
-                last_phase_start = d["iteration"]
-                ranking = []
-
-            bisect.insort(ranking, (d["evidence"], d["configuration"]))
-            last_sample_iteration = d["iteration"]
-
-        if not ranking == []:
-            # write back data from last phase
-            ranking = ranking[0:10]
-            results.append(
-                {
-                    "start": last_phase_start,
-                    "end": scenario_iterations[self.scenario],
-                    "ranking": ranking,
-                }
+        strs = self.config_table.strs
+        results = []
+        for phase in np.flatnonzero(bounds[1:] > bounds[:-1]).tolist():
+            lo, hi = bounds[phase], bounds[phase + 1]
+            ranking = heapq.nsmallest(
+                k,
+                zip(
+                    values[lo:hi].tolist(),
+                    (strs[code] for code in key_configs[lo:hi].tolist()),
+                ),
             )
+            results.append({"start": int(starts[phase]), "end": 0, "ranking": ranking})
+
+        # a phase's results are valid until the next phase starts
+        for res, next_res in zip(results, results[1:]):
+            res["end"] = next_res["start"] - 1
+        if len(results) > 0:
+            results[-1]["end"] = scenario_iterations[self.scenario]
 
         self.tuning_results = results
 
     def compare_tuning_results(self, infile, outfile):
+        """Ranks the configs selected by this run against the rankings of a reference (static) run.
+
+        Every iteration is credited to the rank the reference run assigned to the config this run had selected at
+        that time. Instead of visiting each iteration, the overlaps of the static phases [start, next start) and the
+        dynamic phases [start, next start] are computed with a single sweep over both sorted phase lists.
+
+        Args:
+            infile (str): tuning_results.csv of the reference run as written by write_tuning_results.
+            outfile (str): Prefix of the output .txt holding the histogram.
+        """
         print(f"Comparing optimality of tuning results vs {infile}")
         if self.tuning_results is None:
             self.gather_tuning_results()
 
         histogramm_data = [0] * 10
+        n_its = scenario_iterations[self.scenario]
 
         with open(infile, newline="") as tfile:
             treader = csv.DictReader(tfile, delimiter=",")
             trows = list(treader)
 
-            for static_idx in range(len(trows)):
-                # calculate interval for which this config was deemed optimal (static run)
-                stat_start = int(trows[static_idx]["start"])
-
-                if static_idx == len(trows) - 1:
-                    stat_end = scenario_iterations[self.scenario]
-                else:
-                    stat_end = int(trows[static_idx + 1]["start"])
-
-                static_ranking = ast.literal_eval(trows[static_idx]["ranking"])
-
-                for it in range(stat_start, stat_end):
-                    # check which configs were selected for this interval (dynamic run)
-                    for dynamic_idx in range(len(self.tuning_results)):
-                        dyn_start = int(self.tuning_results[dynamic_idx]["start"])
-
-                        if dynamic_idx == len(self.tuning_results) - 1:
-                            dyn_end = scenario_iterations[self.scenario]
-                        else:
-                            dyn_end = int(self.tuning_results[dynamic_idx + 1]["start"])
-                        dyn_interval = dyn_end - dyn_start
-
-                        if it < dyn_start or it > dyn_end:
-                            continue
-
-                        selected_config = self.tuning_results[dynamic_idx]["ranking"][
-                            0
-                        ][1]
-                        for rank, static_config in enumerate(static_ranking):
-                            # print(f"Comparing (static) {static_config[1]} and {selected_config}")
-                            if static_config[1] == selected_config:
-                                histogramm_data[rank] += 1
-                                break
+        # static phases are half-open, the last one lasts until the end of the simulation
+        stat_starts = np.array([int(row["start"]) for row in trows], dtype=np.int64)
+        stat_ends = np.append(stat_starts[1:], n_its)
+
+        # dynamic phases include their end, i.e. the first iteration of the next phase
+        dyn_starts = np.array(
+            [int(res["start"]) for res in self.tuning_results], dtype=np.int64
+        )
+        dyn_ends = np.append(dyn_starts[1:], n_its) + 1
+        selected_configs = [
+            res["ranking"][0][1] if len(res["ranking"]) > 0 else None
+            for res in self.tuning_results
+        ]
+
+        # first and one past the last dynamic phase overlapping each static phase
+        lo = np.searchsorted(dyn_ends, stat_starts, side="right")
+        hi = np.searchsorted(dyn_starts, stat_ends, side="left")
+
+        for static_idx, row in enumerate(trows):
+            if lo[static_idx] >= hi[static_idx]:
+                continue
+            static_ranks = {}
+            for rank, static_config in enumerate(ast.literal_eval(row["ranking"])):
+                static_ranks.setdefault(static_config[1], rank)
+
+            for dynamic_idx in range(lo[static_idx], hi[static_idx]):
+                rank = static_ranks.get(selected_configs[dynamic_idx])
+                if rank is None or rank >= len(histogramm_data):
+                    continue
+                overlap = min(stat_ends[static_idx], dyn_ends[dynamic_idx]) - max(
+                    stat_starts[static_idx], dyn_starts[dynamic_idx]
+                )
+                histogramm_data[rank] += max(int(overlap), 0)
+
         perc_histogramm= [0]*10                  
         if sum(histogramm_data) != 0:
             perc_histogramm = [num / sum(histogramm_data) for num in histogramm_data]
@@ -679,6 +758,188 @@ class PlotData:
             f.write(f"{histogramm_data}\n")
             f.write(f"{perc_histogramm}\n")
 
+    def predict_runtime(self, trigger_rows, selector_strategy=None):
+        """Predicts the runtime of this run had tuning been triggered in the given rows instead.
+
+        This run serves as reference, usually a run tuning in fixed intervals. A simulated tuning phase triggered in
+        row i starts in row i + 1, costs as much as the recorded phase closest to it and selects the same config as
+        that phase. Between simulated phases, the recorded runtime of each iteration is scaled by how much slower the
+        selected config was than the config this run used at that time, according to the evidence of the latest
+        recorded phase. Recorded tuning iterations are filled with the runtime of the config their phase selected.
+
+        Args:
+            trigger_rows (np.ndarray): Rows of the iteration log in which tuning is triggered, e.g. as returned by
+                TriggerReplay.replay_triggers.
+            selector_strategy (str, optional): AutoPas selector strategy used to reduce the samples of a config.
+                Defaults to the strategy configured for the scenario.
+
+        Returns:
+            dict: "recorded" and "predicted" total runtime in ns, both including neighbor list rebuilds like the
+            cost of the tuning phases and the "Total accumulated" timer, "tuning_cost" and "tuning_its" of the simulated phases and "unknown_its", the number of
+            iterations that could not be scaled for lack of evidence.
+        """
+        phases = self.phases
+        n_rows = len(self.tune)
+        first_rows = phases["first_row"]
+        recorded_configs = phases["config"].astype(np.int64)
+
+        # reduced evidence of each config per recorded phase, NaN if not tested
+        n_configs = max(len(self.config_table), 1)
+        key_phases, key_configs, values = self.reduce_phase_evidence(selector_strategy)
+        evidence = np.full((len(phases), n_configs), np.nan)
+        evidence[key_phases, key_configs] = values
+        # config selected by each recorded phase, the fastest tested one if the log ends while tuning
+        selected = recorded_configs.copy()
+        unfollowed = np.flatnonzero(
+            (selected == NO_CONFIG) & ~np.isnan(evidence).all(axis=1)
+        )
+        selected[unfollowed] = np.nanargmin(evidence[unfollowed], axis=1)
+
+        # runtime of the config selected by this run in every row
+        reference = self.raw_runtime.astype(np.float64)
+        for first, stop in zip(first_rows.tolist(), phases["stop_row"].tolist()):
+            if stop < n_rows:
+                reference[first:stop] = reference[stop]
+            elif first > 0:
+                reference[first:stop] = reference[first - 1]
+        # rebuilds are counted where they happened, the cost of the recorded phases includes them as well
+        reference += self.raw_rebuildtime
+        cumulative = np.concatenate(([0.0], np.cumsum(reference)))
+
+        # simulated phases as (first row, stop row, cost, selected config)
+        simulated = []
+        if len(phases) > 0 and first_rows[0] == 0:
+            simulated.append((0, int(phases["stop_row"][0]), float(phases["cost"][0]), selected[0]))
+        for row in np.sort(np.asarray(trigger_rows, dtype=np.int64)).tolist():
+            first = max(row + 1, simulated[-1][1] if len(simulated) > 0 else 0)
+            if first >= n_rows or len(phases) == 0:
+                continue
+            # recorded phase closest to the simulated one
+            idx = np.searchsorted(first_rows, first)
+            q = min(idx, len(phases) - 1)
+            if idx > 0 and (
+                idx == len(phases) or first - first_rows[idx - 1] <= first_rows[idx] - first
+            ):
+                q = idx - 1
+            stop = min(first + int(phases["n_its"][q]), n_rows)
+            cost = phases["cost"][q] * (stop - first) / phases["n_its"][q]
+            simulated.append((first, stop, float(cost), selected[q]))
+
+        predicted = sum(phase[2] for phase in simulated)
+        unknown_its = 0
+        # non-tuning intervals of the simulated run, before the first phase this run's configs are kept
+        intervals = [(0, simulated[0][0] if len(simulated) > 0 else n_rows, None)]
+        for phase, next_phase in zip(simulated, simulated[1:] + [(n_rows,)]):
+            intervals.append((phase[1], next_phase[0], phase[3]))
+
+        for lo, hi, config in intervals:
+            if lo >= hi:
+                continue
+            inner = first_rows[(first_rows > lo) & (first_rows < hi)].tolist()
+            for a, b in zip([lo] + inner, inner + [hi]):
+                q = np.searchsorted(first_rows, a, side="right") - 1
+                ratio = 1.0
+                if config is not None and q >= 0 and config != recorded_configs[q]:
+                    rec = recorded_configs[q]
+                    ratio = np.nan
+                    if config < n_configs and rec < n_configs:
+                        ratio = evidence[q, config] / evidence[q, rec]
+                    if np.isnan(ratio):
+                        ratio = 1.0
+                        unknown_its += b - a
+                predicted += ratio * (cumulative[b] - cumulative[a])
+
+        return {
+            "recorded": float(phases["cost"].sum() + reference[~self.tune].sum()),
+            "predicted": float(predicted),
+            "tuning_cost": float(sum(phase[2] for phase in simulated)),
+            "tuning_its": sum(phase[1] - phase[0] for phase in simulated),
+            "unknown_its": unknown_its,
+        }
+
+    def oracle_retuning_its(self, param="runtime", method="binseg", penalty=None, min_size=50):
+        """Finds the iterations at which retuning would have paid off, by change point detection.
+
+        Tuning iterations are left out and the series is split after each tuning phase, so changes caused by switching
+        the config are not detected. For the runtime, only change points at which the change of the mean runtime
+        until the next change point outweighs the median cost of a tuning phase are kept.
+
+        Args:
+            param (str, optional): "runtime" or the name of a liveinfo parameter. Defaults to "runtime".
+            method (str, optional): "binseg" or "pelt", see ChangePoints.change_points. Defaults to "binseg".
+            penalty (float, optional): Cost of a change point. Defaults to ChangePoints.default_penalty.
+            min_size (int, optional): Minimum number of iterations between change points. Defaults to 50.
+
+        Returns:
+            np.ndarray: Iterations at which retuning would have paid off.
+        """
+        x = self.runtime if param == "runtime" else self.liveinfo[param]
+        breaks = self.segments["first"][self.segments["after_tuning"]]
+        points = change_points(x, penalty, method, min_size, breaks)
+        if param == "runtime" and len(self.phases) > 0:
+            points = paying_change_points(
+                x, points, np.median(self.phases["cost"]), breaks
+            )
+        return self.iteration[points]
+
+    def replay_liveinfo_triggers(self, candidates=LIVEINFO_TRIGGER_CANDIDATES, tuning_its=None):
+        """Replays candidate triggers on liveinfo features of this run.
+
+        Args:
+            candidates (list, optional): (param, trigger_type, threshold, n_samples) tuples, with trigger_type one
+                of TriggerReplay.LIVEINFO_TRIGGER_TYPES. Defaults to LIVEINFO_TRIGGER_CANDIDATES.
+            tuning_its (int, optional): Length of a simulated tuning phase. Defaults to the median length of the
+                tuning phases of this run.
+
+        Returns:
+            dict: Maps each candidate to the iterations in which it fires.
+        """
+        fired = {}
+        for param, trigger_type, threshold, n_samples in candidates:
+            if param not in self.raw_liveinfo:
+                print(f"Could not read {param} statistics")
+                continue
+            rows = replay_feature_triggers(
+                self.raw_liveinfo[param],
+                self.tune,
+                trigger_type,
+                threshold,
+                n_samples,
+                tuning_its,
+            )
+            fired[(param, trigger_type, threshold, n_samples)] = self.raw_iteration[rows]
+        return fired
+
+    def write_liveinfo_triggers(self, outfile, candidates=LIVEINFO_TRIGGER_CANDIDATES, max_lag=5000):
+        """Writes where candidate liveinfo triggers would fire next to the actual tuning phases of this run.
+
+        Each candidate trigger is matched to the first actual tuning phase (except the initial one) starting at most
+        max_lag iterations after it, the lead being how many iterations earlier the candidate would have fired.
+
+        Args:
+            outfile (str): Prefix of the output .csv.
+            candidates (list, optional): Candidate triggers, see replay_liveinfo_triggers.
+            max_lag (int, optional): Maximum lead of a matched candidate trigger. Defaults to 5000.
+        """
+        print("Writing liveinfo trigger candidates")
+        actual = self.phases["start"][1:]
+        fired = self.replay_liveinfo_triggers(candidates)
+
+        with open(f"{outfile}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["param", "trigger_type", "threshold", "n_samples", "triggers", "matched", "mean_lead", "iterations"]
+            )
+            writer.writerow(
+                ["runtime", "actual", "", "", len(actual), len(actual), 0, actual.tolist()]
+            )
+            for (param, trigger_type, threshold, n_samples), its in fired.items():
+                leads = match_triggers(its, actual, max_lag)["lags"]
+                mean_lead = round(leads.mean(), 0) if len(leads) > 0 else -1
+                writer.writerow(
+                    [param, trigger_type, threshold, n_samples, len(its), len(leads), mean_lead, its.tolist()]
+                )
+
     def write_tuning_results(self, outfile):
         print("Writing tuning results")
         if self.tuning_results is None:
@@ -689,3 +950,36 @@ class PlotData:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(self.tuning_results)
+
+    def write_phase_table(self, outfile):
+        print("Writing tuning phase table")
+        with open(f"{outfile}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["start", "end", "n_its", "cost", "config"])
+            for phase in self.phases.tolist():
+                start, end, _, _, n_its, cost, code = phase
+                config = self.config_table.strs[code] if code != NO_CONFIG else ""
+                writer.writerow([start, end, n_its, cost, config])
+
+
+def load_run(parent_path, job, rank=0, jitter_filter=None):
+    """Loads the logs of a single rank of the job in parent_path, None if any of them is missing.
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        job (str): Name of the job directory.
+        rank (int, optional): MPI rank whose logs to load. Defaults to 0.
+        jitter_filter (JitterFilter, optional): Filter applied to the runtimes, see PlotData. Defaults to None.
+
+    Returns:
+        PlotData: The loaded run.
+    """
+    abs_path = os.path.join(parent_path, job)
+    logs = [
+        os.path.join(abs_path, f"liveinfoLog_Rank{rank}.csv"),
+        os.path.join(abs_path, f"iterationLog_Rank{rank}.csv"),
+        os.path.join(abs_path, f"tuningLog_Rank{rank}.txt"),
+    ]
+    if not all(os.path.isfile(log) for log in logs):
+        return None
+    return PlotData(job, *logs, rank, jitter_filter=jitter_filter)
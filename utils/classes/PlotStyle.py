@@ -0,0 +1,97 @@
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import ScalarFormatter
+
+# https://tex.stackexchange.com/a/391078
+pgf_with_latex = {
+    "pgf.texsystem": "pdflatex",
+    "text.usetex": True,
+    "font.family": "serif",
+    "font.serif": [],
+    "font.sans-serif": [],  # onherit fonts
+    "font.monospace": [],
+    "axes.labelsize": 24,  # default 10pt
+    "font.size": 18,
+    "legend.fontsize": 18,  # default 8pt
+    "xtick.labelsize": 18,  # default 8pt
+    "ytick.labelsize": 18,
+}
+mpl.rcParams.update(pgf_with_latex)
+
+# draft figures typeset with mathtext in computer modern instead of running LaTeX for every label
+draft_style = {
+    **pgf_with_latex,
+    "text.usetex": False,
+    "mathtext.fontset": "cm",
+    "font.serif": ["cmr10"],
+    "axes.formatter.use_mathtext": True,
+    "axes.unicode_minus": False,  # cmr10 has no unicode minus
+}
+
+# publication renders png and pdf through LaTeX, draft only png through Agg
+RENDER_PROFILES = {"publication": pgf_with_latex, "draft": draft_style}
+render_profile = "publication"
+
+# figure reused by all plots of the draft profile
+_draft_figure = None
+
+
+def use_render_profile(profile):
+    """Switches the style and outputs of all following plots to one of RENDER_PROFILES."""
+    global render_profile
+    mpl.rcParams.update(RENDER_PROFILES[profile])
+    if profile == "draft":
+        plt.switch_backend("Agg")
+    render_profile = profile
+
+
+def new_figure(layout=None):
+    """Returns a figure with a single axes. The draft profile clears and reuses the same figure for every plot."""
+    global _draft_figure
+    if render_profile != "draft":
+        return plt.subplots(layout=layout)
+    if _draft_figure is None:
+        _draft_figure = Figure()
+        FigureCanvasAgg(_draft_figure)
+    fig = _draft_figure
+    fig.clear()
+    fig.set_layout_engine(layout)
+    fig.set_size_inches(mpl.rcParams["figure.figsize"])
+    return fig, fig.add_subplot()
+
+
+def save_figure(fig, output_prefix, bbox_inches, pad_inches=None):
+    """Writes a figure to output_prefix.png, and to output_prefix.pdf unless rendering drafts."""
+    fig.savefig(f"{output_prefix}.png", dpi=300, bbox_inches=bbox_inches)
+    if render_profile != "draft":
+        fig.savefig(
+            f"{output_prefix}.pdf",
+            format="pdf",
+            dpi=150,
+            bbox_inches=bbox_inches,
+            pad_inches=pad_inches,
+        )
+
+# format y axis in plots as 10^x
+exp_formatter = ScalarFormatter(useMathText=True)
+exp_formatter.set_scientific(True)
+exp_formatter.set_powerlimits((0, 0))
+
+axis_cols = list(mcolors.TABLEAU_COLORS.values())
+
+
+# as in https://stackoverflow.com/a/44971177
+def set_size(w, h, ax=None):
+    """w, h: width, height in inches"""
+    if not ax:
+        ax = plt.gca()
+    l = ax.figure.subplotpars.left
+    r = ax.figure.subplotpars.right
+    t = ax.figure.subplotpars.top
+    b = ax.figure.subplotpars.bottom
+    figw = float(w) / (r - l)
+    figh = float(h) / (t - b)
+    ax.figure.set_size_inches(figw, figh)
@@ -0,0 +1,232 @@
+import os, json, sqlite3
+
+from classes.JobLog import TOTAL_TIMER
+from classes.Segments import NO_CONFIG
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    job TEXT PRIMARY KEY,
+    scenario TEXT,
+    trigger_type TEXT,
+    trigger_factor REAL,
+    trigger_n_samples INTEGER,
+    use_dynamic_tuning INTEGER,
+    template TEXT,
+    config_hash TEXT,
+    environment TEXT,
+    iterations INTEGER,
+    tuning_its INTEGER,
+    mfups REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_trigger
+    ON runs (scenario, trigger_type, trigger_factor, trigger_n_samples);
+CREATE TABLE IF NOT EXISTS timers (
+    job TEXT,
+    name TEXT,
+    ns INTEGER,
+    PRIMARY KEY (job, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS timers_by_name ON timers (name, job);
+CREATE TABLE IF NOT EXISTS phases (
+    job TEXT,
+    rank INTEGER,
+    first_it INTEGER,
+    last_it INTEGER,
+    n_its INTEGER,
+    cost INTEGER,
+    config TEXT,
+    PRIMARY KEY (job, rank, first_it)
+) WITHOUT ROWID;
+"""
+
+# trigger setting of the run tuning in fixed intervals each scenario is compared against
+BASELINE_TRIGGER = ("StaticSimple", 1.0, 10)
+
+
+def parse_job_name(job):
+    """Recovers scenario and trigger setting from a job name like SimulationRun.dynamic_job creates them.
+
+    Only used for jobs whose SimulationRun was never added to the store, e.g. results of older sweeps.
+
+    Args:
+        job (str): Name of the job directory.
+
+    Returns:
+        tuple: Scenario, trigger type, trigger factor and number of samples, None for the trigger of non-dynamic jobs.
+    """
+    tokens = job.split("_")
+    if len(tokens) >= 5 and tokens[1] == "dynamic":
+        try:
+            return tokens[0], tokens[2], float(tokens[3]), int(tokens[4])
+        except ValueError:
+            pass
+    return tokens[0], None, None, None
+
+
+class ResultsStore:
+    """Local SQLite database of the experiment results, queried by scenario and trigger instead of job names.
+
+    Runs are keyed by job name and carry the full ConfigEnvironment they were generated with, the hash of their
+    config file in gen/ and the summary of their job log. Timers and tuning phases live in tables of their own.
+
+    Args:
+        db_file (str): Path of the database, created if missing.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.connection = sqlite3.connect(db_file)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def add_runs(self, runs):
+        """Stores the environment of each SimulationRun in runs, keeping results already stored for their jobs."""
+        rows = []
+        for run in runs:
+            env = run.config_env
+            rows.append(
+                (
+                    run.job_name,
+                    os.path.basename(os.path.normpath(run.template_dir)),
+                    env.trigger_type or None,
+                    env.trigger_factor if env.trigger_type else None,
+                    env.trigger_n_samples if env.trigger_type else None,
+                    int(env.use_dynamic_tuning),
+                    run.template_name,
+                    env.config_hash(),
+                    json.dumps(env.context(), sort_keys=True),
+                )
+            )
+        with self.connection:
+            self.connection.executemany(
+                """INSERT INTO runs (job, scenario, trigger_type, trigger_factor, trigger_n_samples,
+                    use_dynamic_tuning, template, config_hash, environment) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job) DO UPDATE SET scenario = excluded.scenario, trigger_type = excluded.trigger_type,
+                    trigger_factor = excluded.trigger_factor, trigger_n_samples = excluded.trigger_n_samples,
+                    use_dynamic_tuning = excluded.use_dynamic_tuning, template = excluded.template,
+                    config_hash = excluded.config_hash, environment = excluded.environment""",
+                rows,
+            )
+
+    def add_summaries(self, table):
+        """Stores the job log summaries returned by JobLog.collect_job_summaries.
+
+        Jobs not added by add_runs before get their scenario and trigger from their name.
+        """
+        timers = [name for name in table.dtype.names if name.endswith("[ns]")]
+        with self.connection:
+            self.connection.executemany(
+                """INSERT INTO runs (job, scenario, trigger_type, trigger_factor, trigger_n_samples)
+                VALUES (?, ?, ?, ?, ?) ON CONFLICT (job) DO NOTHING""",
+                [(str(job), *parse_job_name(str(job))) for job in table["job"]],
+            )
+            self.connection.executemany(
+                "UPDATE runs SET iterations = ?, tuning_its = ?, mfups = ? WHERE job = ?",
+                [
+                    (
+                        *(None if row[name] == -1 else row[name].item() for name in ["iterations", "tuning_its", "mfups"]),
+                        str(row["job"]),
+                    )
+                    for row in table
+                ],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO timers (job, name, ns) VALUES (?, ?, ?)",
+                [
+                    (str(row["job"]), name.removesuffix("[ns]"), int(row[name]))
+                    for row in table
+                    for name in timers
+                    if row[name] != -1
+                ],
+            )
+
+    def add_phases(self, run):
+        """Stores the tuning phases of a loaded PlotData, replacing those stored for its job and rank before."""
+        strs = run.config_table.strs
+        rows = [
+            (run.job_name, run.rank, int(start), int(end), int(n_its), int(cost), strs[code] if code != NO_CONFIG else None)
+            for start, end, _, _, n_its, cost, code in run.phases.tolist()
+        ]
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM phases WHERE job = ? AND rank = ?", (run.job_name, run.rank)
+            )
+            self.connection.executemany(
+                "INSERT INTO phases (job, rank, first_it, last_it, n_its, cost, config) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def query(self, sql, params=()):
+        """Runs an arbitrary query, returning its rows as sqlite3.Row."""
+        return self.connection.execute(sql, params).fetchall()
+
+    def runs(self, scenario=None, trigger_type=None, trigger_factor=None, trigger_n_samples=None):
+        """Returns the stored runs matching all given settings, ordered like the rows of the runtime tables."""
+        filters = {
+            "scenario": scenario,
+            "trigger_type": trigger_type,
+            "trigger_factor": trigger_factor,
+            "trigger_n_samples": trigger_n_samples,
+        }
+        filters = {name: value for name, value in filters.items() if value is not None}
+        where = " AND ".join(f"{name} = ?" for name in filters) or "1"
+        return self.query(
+            f"""SELECT * FROM runs WHERE {where}
+            ORDER BY scenario, trigger_type, trigger_n_samples DESC, trigger_factor""",
+            tuple(filters.values()),
+        )
+
+    def timers(self, job):
+        """Returns the timers of a job as dict name -> ns."""
+        return dict(self.query("SELECT name, ns FROM timers WHERE job = ?", (job,)))
+
+    def phases(self, job, rank=0):
+        """Returns the tuning phases of a rank of a job in order."""
+        return self.query(
+            "SELECT * FROM phases WHERE job = ? AND rank = ? ORDER BY first_it", (job, rank)
+        )
+
+    def speedups(self, scenario=None, baseline=BASELINE_TRIGGER):
+        """Compares the total runtime of each dynamic run with the baseline run of its scenario.
+
+        Args:
+            scenario (str, optional): Scenario to compare, all if None. Defaults to None.
+            baseline (tuple, optional): Trigger type, factor and number of samples of the baseline run. Defaults to
+                BASELINE_TRIGGER.
+
+        Returns:
+            list: Rows with job, trigger setting, "total_runtime", "baseline_runtime", "runtime_speedup_perc",
+            "runtime_delta_abs", "tuning_its" and "tuning_its_perc".
+        """
+        return self.query(
+            """SELECT r.job, r.scenario, r.trigger_type, r.trigger_factor, r.trigger_n_samples,
+                t.ns AS total_runtime, bt.ns AS baseline_runtime,
+                ROUND((CAST(bt.ns AS REAL) / t.ns - 1) * 100, 0) AS runtime_speedup_perc,
+                t.ns - bt.ns AS runtime_delta_abs,
+                r.tuning_its,
+                ROUND(100.0 * r.tuning_its / COALESCE(r.iterations, json_extract(r.environment, '$.iterations')), 2)
+                    AS tuning_its_perc
+            FROM runs r
+            JOIN timers t ON t.job = r.job AND t.name = :total
+            JOIN runs b ON b.scenario = r.scenario AND b.trigger_type = :type AND b.trigger_factor = :factor
+                AND b.trigger_n_samples = :n_samples
+            JOIN timers bt ON bt.job = b.job AND bt.name = :total
+            WHERE r.trigger_type IS NOT NULL AND (:scenario IS NULL OR r.scenario = :scenario)
+            ORDER BY r.scenario, r.trigger_type, r.trigger_n_samples DESC, r.trigger_factor""",
+            {
+                "total": TOTAL_TIMER,
+                "type": baseline[0],
+                "factor": baseline[1],
+                "n_samples": baseline[2],
+                "scenario": scenario,
+            },
+        )
@@ -0,0 +1,54 @@
+import numpy as np
+
+# The batch functions evaluate a statistic over all windows of w consecutive samples at once. Results are aligned
+# with the last sample of each window, i.e. entry i describes x[i-w+1], ..., x[i], and are NaN where the window
+# does not fit. All of them only take a few prefix sums, independent of the window size.
+
+
+def _prefix_sums(x):
+    return np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+
+
+def _windowed(prefix, w):
+    """Differences of a prefix sum over all windows of length w, NaN-padded to the length of the series."""
+    n = len(prefix) - 1
+    out = np.full(n, np.nan)
+    if 0 < w <= n:
+        out[w - 1 :] = prefix[w:] - prefix[:-w]
+    return out
+
+
+def rolling_sum(x, w):
+    """Sums x over all windows of length w."""
+    return _windowed(_prefix_sums(x), w)
+
+
+def rolling_mean(x, w):
+    """Averages x over all windows of length w."""
+    return rolling_sum(x, w) / w
+
+
+def rolling_ols(y, w):
+    """Fits a line through each window of length w by ordinary least squares.
+
+    Samples are placed at x = 0, ..., w-1 within each window, so the intercept is the fitted value of the first
+    sample of the window and intercept + (w-1) * slope the one of the last.
+
+    Args:
+        y (np.ndarray): The series.
+        w (int): Window length, at least 2.
+
+    Returns:
+        tuple: Slope and intercept of each window.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    shift = y.mean() if len(y) > 0 else 0.0
+    shifted = y - shift
+    idx = np.arange(len(y), dtype=np.float64)
+
+    s = rolling_sum(shifted, w)
+    # sum of (k - (w-1)/2) * y_k over the window, from the windowed sum of m * y_m
+    centered = rolling_sum(idx * shifted, w) - (idx - w + 1 + (w - 1) / 2) * s
+    slope = centered / (w * (w * w - 1) / 12)
+    intercept = s / w + shift - slope * (w - 1) / 2
+    return slope, intercept
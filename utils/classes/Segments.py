@@ -0,0 +1,143 @@
+import numpy as np
+
+from classes.TuningConfig import CONFIG_CODE_DTYPE
+
+# one row per maximal run of consecutive non-tuning iterations using the same configuration
+SEGMENT_DTYPE = np.dtype(
+    [
+        ("start", np.int64),  # first iteration of the segment
+        ("end", np.int64),  # last iteration of the segment (inclusive)
+        ("first", np.int64),  # index of the first iteration in the arrays without tuning iterations
+        ("stop", np.int64),  # index after the last iteration in the arrays without tuning iterations
+        ("config", CONFIG_CODE_DTYPE),  # config code as handed out by ConfigTable
+        ("after_tuning", np.bool_),  # whether the segment directly follows a tuning phase
+    ]
+)
+
+
+def config_segments(iteration, config_codes, tune):
+    """Run-length encodes the configurations of the non-tuning iterations of a run.
+
+    A new segment starts whenever the configuration changes or the iterations are not consecutive, e.g. because
+    tuning iterations were left out.
+
+    Args:
+        iteration (np.ndarray): Iteration of each row of the log, including tuning iterations.
+        config_codes (np.ndarray): Config code of each row of the log.
+        tune (np.ndarray): Whether each row of the log was a tuning iteration.
+
+    Returns:
+        np.ndarray: Structured array of SEGMENT_DTYPE in order of iteration.
+    """
+    rows = np.flatnonzero(~tune)
+    if len(rows) == 0:
+        return np.zeros(0, dtype=SEGMENT_DTYPE)
+
+    its = iteration[rows]
+    codes = config_codes[rows]
+    breaks = np.flatnonzero((np.diff(its) != 1) | (np.diff(codes) != 0)) + 1
+    first = np.concatenate(([0], breaks))
+    stop = np.concatenate((breaks, [len(rows)]))
+
+    segments = np.zeros(len(first), dtype=SEGMENT_DTYPE)
+    segments["start"] = its[first]
+    segments["end"] = its[stop - 1]
+    segments["first"] = first
+    segments["stop"] = stop
+    segments["config"] = codes[first]
+    prev_rows = rows[first] - 1
+    segments["after_tuning"] = (prev_rows >= 0) & tune[np.maximum(prev_rows, 0)]
+    return segments
+
+
+def segment_configs(segments):
+    """Returns the distinct config codes of the segments in order of first use."""
+    codes, first = np.unique(segments["config"], return_index=True)
+    return codes[np.argsort(first)]
+
+
+def segment_rows(segments):
+    """Returns the indices of all iterations covered by the given segments in the arrays without tuning iterations."""
+    lengths = segments["stop"] - segments["first"]
+    offsets = segments["first"] - (np.cumsum(lengths) - lengths)
+    return np.repeat(offsets, lengths) + np.arange(lengths.sum())
+
+
+# config code used for phases that are not followed by any non-tuning iteration
+NO_CONFIG = np.iinfo(CONFIG_CODE_DTYPE).max
+
+# one row per tuning phase, i.e. maximal run of consecutive tuning iterations
+PHASE_DTYPE = np.dtype(
+    [
+        ("start", np.int64),  # first iteration of the phase
+        ("end", np.int64),  # last iteration of the phase (inclusive)
+        ("first_row", np.int64),  # index of the first iteration of the phase in the log
+        ("stop_row", np.int64),  # index after the last iteration of the phase in the log
+        ("n_its", np.int64),  # number of tuning iterations
+        ("cost", np.int64),  # total runtime of the tuning iterations in ns
+        ("config", CONFIG_CODE_DTYPE),  # config selected by the phase, NO_CONFIG if the log ends while tuning
+    ]
+)
+
+
+def tuning_phases(iteration, runtime, config_codes, tune):
+    """Finds the tuning phases of a run.
+
+    Args:
+        iteration (np.ndarray): Iteration of each row of the log, including tuning iterations.
+        runtime (np.ndarray): Runtime of each row in ns.
+        config_codes (np.ndarray): Config code of each row of the log.
+        tune (np.ndarray): Whether each row of the log was a tuning iteration.
+
+    Returns:
+        np.ndarray: Structured array of PHASE_DTYPE in order of iteration.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], tune.astype(np.int8), [0]))))
+    first, stop = edges[::2], edges[1::2]
+
+    phases = np.zeros(len(first), dtype=PHASE_DTYPE)
+    phases["start"] = iteration[first]
+    phases["end"] = iteration[stop - 1]
+    phases["first_row"] = first
+    phases["stop_row"] = stop
+    phases["n_its"] = stop - first
+    cumulative = np.concatenate(([0], np.cumsum(runtime, dtype=np.int64)))
+    phases["cost"] = cumulative[stop] - cumulative[first]
+
+    # the config of the first iteration after a phase is the one it selected
+    followed = stop < len(tune)
+    phases["config"] = NO_CONFIG
+    phases["config"][followed] = config_codes[stop[followed]]
+    return phases
+
+
+def reduce_by_key(keys, values, reduction):
+    """Reduces the values sharing the same key.
+
+    Args:
+        keys (np.ndarray): Integer key of each value.
+        values (np.ndarray): Values to reduce.
+        reduction (str): One of "min", "mean" or "median".
+
+    Returns:
+        tuple: The distinct keys in ascending order and the reduced value of each.
+    """
+    if len(keys) == 0:
+        return keys, values.astype(np.float64)
+    order = np.lexsort((values, keys))
+    keys = keys[order]
+    values = values[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    counts = np.diff(np.append(starts, len(keys)))
+
+    match reduction:
+        case "min":
+            reduced = values[starts].astype(np.float64)
+        case "mean":
+            reduced = np.add.reduceat(values.astype(np.float64), starts) / counts
+        case "median":
+            # values are sorted within each key
+            reduced = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+        case _:
+            raise NotImplementedError
+    return keys[starts], reduced
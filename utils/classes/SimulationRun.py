@@ -24,11 +24,9 @@ class ConfigEnvironment:
     vtk_write_frequency: int = 1000
     dummy: str = "" # for special jobs
 
-    def generate_config_file(self, template_dir, template_name):
-        with open(template_dir + "/" + template_name) as f:
-            template = Template(f.read())
-
-        context = {
+    def context(self):
+        """Returns the variables rendered into the config template."""
+        return {
             "iterations": self.iterations,
             "tuning_strategies": self.tuning_strategies,
             "tuning_interval": self.tuning_interval,
@@ -45,9 +43,16 @@ class ConfigEnvironment:
             "dummy": self.dummy,
         }
 
-        rendered = template.render(**context)
-        hash_str = hashlib.md5(yaml.dump(context, sort_keys=True).encode()).hexdigest()
-        outfile = template_dir + "/gen/" + hash_str + ".yaml"
+    def config_hash(self):
+        """Returns the hash naming the generated config file in the gen/ directory of the template."""
+        return hashlib.md5(yaml.dump(self.context(), sort_keys=True).encode()).hexdigest()
+
+    def generate_config_file(self, template_dir, template_name):
+        with open(template_dir + "/" + template_name) as f:
+            template = Template(f.read())
+
+        rendered = template.render(**self.context())
+        outfile = template_dir + "/gen/" + self.config_hash() + ".yaml"
 
         with open(outfile, "w") as f:
             f.write(rendered)
@@ -172,8 +177,9 @@ static_jobs = [
     for scenario in scenarios
 ]
 
-dynamic_jobs = [
-    SimulationRun(
+def dynamic_job(scenario, trigger_type, trigger_factor, trigger_n):
+    """Creates the run of a scenario with dynamic tuning intervals using the given trigger."""
+    return SimulationRun(
         f"{scenario}_dynamic_{trigger_type}_{trigger_factor}_{trigger_n}",
         CONFIG_DIR + scenario,
         "template.jinja",
@@ -186,6 +192,10 @@ dynamic_jobs = [
             cell_size=cell_sizes[scenario],
         ),
     )
+
+
+dynamic_jobs = [
+    dynamic_job(scenario, trigger_type, trigger_factor, trigger_n)
     for scenario in scenarios
     for trigger_type in trigger_types
     for trigger_factor in trigger_factors[trigger_type]
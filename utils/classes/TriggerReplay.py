@@ -0,0 +1,235 @@
+import math, sys
+import numpy as np
+
+from classes.LogReader import read_iteration_log
+from classes.RollingStats import rolling_sum, rolling_mean, rolling_ols
+
+# dynamic trigger types of AutoPas as used in SimulationRun.trigger_types
+TRIGGER_TYPES = [
+    "TimeBasedSimple",
+    "TimeBasedAverage",
+    "TimeBasedSplit",
+    "TimeBasedRegression",
+]
+
+
+def window_length(trigger_type, trigger_n_samples):
+    """Returns the number of runtime samples (including the current one) a trigger inspects."""
+    match trigger_type:
+        case "TimeBasedSimple":
+            return 2
+        case "TimeBasedAverage" | "TimeBasedSplit" | "TimeBasedRegression":
+            if trigger_n_samples < 1:
+                raise ValueError(f"{trigger_type} needs at least one sample")
+            return trigger_n_samples + 1
+        case _:
+            print(f"Trigger {trigger_type} not implemented")
+            raise NotImplementedError
+
+
+def trigger_conditions(runtime, trigger_type, trigger_factor, trigger_n_samples):
+    """Evaluates the condition of a trigger for every iteration at once.
+
+    The conditions follow the definitions of the thesis, with t_i the runtime of iteration i, lambda the
+    trigger factor and n the number of samples:
+        TimeBasedSimple: t_i >= lambda * t_{i-1}
+        TimeBasedAverage: t_i >= lambda * avg[t_{i-n}, t_{i-1}]
+        TimeBasedSplit: avg(B) >= lambda * avg(A), A = [t_{i-n}, t_{i-j}], B = [t_{i-j+1}, t_i], j = ceil(n/2)
+        TimeBasedRegression: (2 t_i + (n+1) beta_1') / (2 t_avg) >= lambda with the slope beta_1' of [t_{i-n}, t_i]
+
+    Args:
+        runtime (np.ndarray): Runtime of each iteration in ns, excluding rebuild times.
+        trigger_type (str): One of TRIGGER_TYPES.
+        trigger_factor (float): The trigger factor lambda.
+        trigger_n_samples (int): The number of samples n, ignored by TimeBasedSimple.
+
+    Returns:
+        np.ndarray: Whether the trigger condition holds in each iteration, False where the window does not fit.
+    """
+    t = np.asarray(runtime, dtype=np.float64)
+    n = trigger_n_samples
+    cond = np.zeros(len(t), dtype=bool)
+    if len(t) < window_length(trigger_type, n):
+        return cond
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        match trigger_type:
+            case "TimeBasedSimple":
+                cond[1:] = t[1:] >= trigger_factor * t[:-1]
+            case "TimeBasedAverage":
+                prev_avg = rolling_mean(t, n)[:-1]
+                cond[1:] = t[1:] >= trigger_factor * prev_avg
+            case "TimeBasedSplit":
+                j = math.ceil(n / 2)
+                avg_b = rolling_mean(t, j)
+                avg_a = rolling_mean(t, n - j + 1)
+                cond[j:] = avg_b[j:] >= trigger_factor * avg_a[:-j]
+            case "TimeBasedRegression":
+                slope, _ = rolling_ols(t, n + 1)
+                t_avg = rolling_mean(t, n + 1)
+                cond = (2 * t + (n + 1) * slope) / (2 * t_avg) >= trigger_factor
+    return cond
+
+
+def select_triggers(candidates, tune, w, tuning_its=None):
+    """Chooses the iterations in which a trigger fires from those in which its condition holds.
+
+    The triggers are chosen in order: after a trigger fires in row i, a simulated tuning phase of tuning_its
+    iterations starts in row i + 1, and the window of w samples has to be refilled before the next trigger can fire.
+
+    Args:
+        candidates (np.ndarray): Sorted rows in which the trigger condition holds.
+        tune (np.ndarray): Whether each row of the iteration log was a tuning iteration.
+        w (int): Number of samples the trigger inspects.
+        tuning_its (int, optional): Length of a simulated tuning phase. Defaults to the median length of the
+            tuning phases of the recorded run.
+
+    Returns:
+        np.ndarray: Rows of the iteration log in which the trigger fires.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], tune.astype(np.int8), [0]))))
+    first, stop = edges[::2], edges[1::2]
+    if tuning_its is None:
+        tuning_its = int(np.median(stop - first)) if len(first) > 0 else 0
+    # every run starts with a tuning phase
+    refill_start = stop[0] if len(first) > 0 and first[0] == 0 else 0
+
+    triggers = []
+    pos = np.searchsorted(candidates, refill_start + w - 1)
+    while pos < len(candidates):
+        i = candidates[pos]
+        triggers.append(i)
+        refill_start = i + 1 + tuning_its
+        pos = np.searchsorted(candidates, refill_start + w - 1)
+    return np.array(triggers, dtype=np.int64)
+
+
+def replay_triggers(
+    runtime, tune, trigger_type, trigger_factor, trigger_n_samples, tuning_its=None
+):
+    """Replays the decisions of a dynamic trigger on a recorded run.
+
+    Conditions are evaluated for all iterations at once. Windows containing tuning iterations of the recorded
+    run are not considered, as their runtimes stem from the configurations tested. The triggers are then chosen by
+    select_triggers.
+
+    Args:
+        runtime (np.ndarray): Runtime of each row of the iteration log in ns, excluding rebuild times.
+        tune (np.ndarray): Whether each row of the iteration log was a tuning iteration.
+        trigger_type (str): One of TRIGGER_TYPES.
+        trigger_factor (float): The trigger factor lambda.
+        trigger_n_samples (int): The number of samples n, ignored by TimeBasedSimple.
+        tuning_its (int, optional): Length of a simulated tuning phase, see select_triggers.
+
+    Returns:
+        np.ndarray: Rows of the iteration log in which the trigger fires.
+    """
+    tune = np.asarray(tune, dtype=bool)
+    w = window_length(trigger_type, trigger_n_samples)
+    cond = trigger_conditions(runtime, trigger_type, trigger_factor, trigger_n_samples)
+    tuning_in_window = rolling_sum(tune, w) > 0
+    return select_triggers(np.flatnonzero(cond & ~tuning_in_window), tune, w, tuning_its)
+
+
+# candidate triggers on liveinfo features, prototyped offline and not available in AutoPas
+LIVEINFO_TRIGGER_TYPES = [
+    "RelativeChange",
+    "SplitChange",
+]
+
+
+def feature_conditions(values, trigger_type, threshold, n_samples):
+    """Evaluates the condition of a liveinfo trigger for every iteration at once.
+
+    With f_i the value of the feature in iteration i, the conditions are
+        RelativeChange: |f_i / avg[f_{i-n}, f_{i-1}] - 1| >= threshold
+        SplitChange: |avg(B) / avg(A) - 1| >= threshold with A and B as for TimeBasedSplit
+    Unlike runtimes, features may change in both directions when a different config becomes optimal.
+
+    Args:
+        values (np.ndarray): Value of the liveinfo feature in each iteration.
+        trigger_type (str): One of LIVEINFO_TRIGGER_TYPES.
+        threshold (float): Relative change at which the trigger fires.
+        n_samples (int): The number of samples n.
+
+    Returns:
+        np.ndarray: Whether the trigger condition holds in each iteration.
+    """
+    f = np.asarray(values, dtype=np.float64)
+    n = n_samples
+    cond = np.zeros(len(f), dtype=bool)
+    if n < 1 or len(f) < n + 1:
+        return cond
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        match trigger_type:
+            case "RelativeChange":
+                change = f[1:] / rolling_mean(f, n)[:-1]
+                cond[1:] = np.abs(change - 1) >= threshold
+            case "SplitChange":
+                j = math.ceil(n / 2)
+                change = rolling_mean(f, j)[j:] / rolling_mean(f, n - j + 1)[:-j]
+                cond[j:] = np.abs(change - 1) >= threshold
+            case _:
+                print(f"Trigger {trigger_type} not implemented")
+                raise NotImplementedError
+    return cond
+
+
+def replay_feature_triggers(
+    values, tune, trigger_type, threshold, n_samples, tuning_its=None
+):
+    """Replays a liveinfo trigger on a recorded run.
+
+    Liveinfo features do not depend on the config, so windows containing tuning iterations are considered as well.
+
+    Args:
+        values (np.ndarray): Value of the liveinfo feature in each row of the iteration log.
+        tune (np.ndarray): Whether each row of the iteration log was a tuning iteration.
+        trigger_type (str): One of LIVEINFO_TRIGGER_TYPES.
+        threshold (float): Relative change at which the trigger fires.
+        n_samples (int): The number of samples n.
+        tuning_its (int, optional): Length of a simulated tuning phase, see select_triggers.
+
+    Returns:
+        np.ndarray: Rows of the iteration log in which the trigger fires.
+    """
+    tune = np.asarray(tune, dtype=bool)
+    cond = feature_conditions(values, trigger_type, threshold, n_samples)
+    return select_triggers(np.flatnonzero(cond), tune, n_samples + 1, tuning_its)
+
+
+def replay_log(
+    iteration_file,
+    trigger_type,
+    trigger_factor,
+    trigger_n_samples,
+    tuning_its=None,
+    range_start=0,
+    range_end=sys.maxsize,
+):
+    """Replays a trigger on a recorded iteration log.
+
+    Args:
+        iteration_file (str): Path to the .csv file containing the iteration log of the simulation.
+        trigger_type (str): One of TRIGGER_TYPES.
+        trigger_factor (float): The trigger factor lambda.
+        trigger_n_samples (int): The number of samples n, ignored by TimeBasedSimple.
+        tuning_its (int, optional): Length of a simulated tuning phase, see replay_triggers.
+        range_start (int, optional): First row of the log to replay. Defaults to 0.
+        range_end (int, optional): Row after the last row of the log to replay. Defaults to sys.maxsize.
+
+    Returns:
+        np.ndarray: Iterations in which the trigger fires.
+    """
+    log = read_iteration_log(iteration_file, range_start, range_end)
+    runtime = log["computeInteractionsTotal[ns]"] - log["rebuildNeighborLists[ns]"]
+    rows = replay_triggers(
+        runtime,
+        log["inTuningPhase"],
+        trigger_type,
+        trigger_factor,
+        trigger_n_samples,
+        tuning_its,
+    )
+    return log["Iteration"][rows]
@@ -0,0 +1,208 @@
+import math, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from classes.PlotData import load_run
+from classes.SimulationRun import dynamic_job
+from classes.TriggerReplay import TRIGGER_TYPES, replay_triggers
+
+# search space of the trigger parameters
+FACTOR_BOUNDS = (1.05, 3.0)
+N_SAMPLES_BOUNDS = (10, 2000)
+
+# settings emitted as jobs differ at least this much in factor or number of samples
+MIN_FACTOR_DISTANCE = 0.05
+MIN_SAMPLES_RATIO = 1.25
+
+# TimeBasedSimple ignores the number of samples, its jobs use the same value as in SimulationRun
+SIMPLE_N_SAMPLES = 10
+
+# reference run of the worker processes, loaded once per worker
+_reference = None
+
+
+def _init_worker(parent_path, job, rank):
+    global _reference
+    _reference = load_run(parent_path, job, rank)
+
+
+def _score(setting):
+    """Predicted total runtime of the reference run with the trigger setting (type, factor, n_samples)."""
+    triggers = replay_triggers(_reference.raw_runtime, _reference.tune, *setting)
+    return _reference.predict_runtime(triggers)["predicted"]
+
+
+def clamp_setting(trigger_type, trigger_factor, trigger_n_samples):
+    """Clamps a setting to the search space and rounds it to the precision used in job names."""
+    trigger_factor = round(min(max(trigger_factor, FACTOR_BOUNDS[0]), FACTOR_BOUNDS[1]), 2)
+    if trigger_type == "TimeBasedSimple":
+        return (trigger_type, trigger_factor, SIMPLE_N_SAMPLES)
+    trigger_n_samples = round(
+        min(max(trigger_n_samples, N_SAMPLES_BOUNDS[0]), N_SAMPLES_BOUNDS[1])
+    )
+    return (trigger_type, trigger_factor, trigger_n_samples)
+
+
+def initial_settings(trigger_types, n_factors=6, n_samples=5):
+    """Spreads settings evenly over the search space, the number of samples on a logarithmic scale."""
+    factors = [
+        FACTOR_BOUNDS[0] + (FACTOR_BOUNDS[1] - FACTOR_BOUNDS[0]) * i / (n_factors - 1)
+        for i in range(n_factors)
+    ]
+    log_lo, log_hi = math.log(N_SAMPLES_BOUNDS[0]), math.log(N_SAMPLES_BOUNDS[1])
+    samples = [
+        math.exp(log_lo + (log_hi - log_lo) * i / (n_samples - 1))
+        for i in range(n_samples)
+    ]
+    return {
+        clamp_setting(trigger_type, factor, n)
+        for trigger_type in trigger_types
+        for factor in factors
+        for n in samples
+    }
+
+
+def refine_settings(best, factor_step, samples_step):
+    """Returns the neighbours of each setting in best on a pattern of the given step sizes.
+
+    Args:
+        best (list): Settings to refine.
+        factor_step (float): Distance of neighbours in the trigger factor.
+        samples_step (float): Ratio of neighbours in the number of samples, > 1.
+
+    Returns:
+        set: The clamped neighbours, including the settings themselves.
+    """
+    neighbours = set()
+    for trigger_type, factor, n in best:
+        for df in (-factor_step, 0, factor_step):
+            for dn in (1 / samples_step, 1, samples_step):
+                neighbours.add(clamp_setting(trigger_type, factor + df, n * dn))
+    return neighbours
+
+
+class TriggerSearch:
+    """Searches trigger settings for a scenario by replaying them on a recorded reference run.
+
+    The search starts on a coarse grid of trigger factors and numbers of samples and then repeatedly refines the
+    neighbourhood of the best settings with halved step sizes. Each batch of settings is scored in parallel by the
+    runtime PlotData.predict_runtime predicts for it.
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        reference_job (str): Job tuning in fixed intervals to replay the triggers on.
+        rank (int, optional): MPI rank whose logs to use. Defaults to 0.
+        workers (int, optional): Number of worker processes, 1 scores all settings in this process. Defaults to 1.
+    """
+
+    def __init__(self, parent_path, reference_job, rank=0, workers=1):
+        self.parent_path = parent_path
+        self.reference_job = reference_job
+        self.scenario = reference_job.split("_")[0]
+        self.rank = rank
+        self.workers = workers
+        self.scores = {}
+        self._loaded = False
+
+    def evaluate(self, settings, pool=None):
+        """Scores all settings not scored yet, spread over the worker processes of pool if given."""
+        settings = sorted(set(settings) - self.scores.keys())
+        if len(settings) == 0:
+            return
+
+        if pool is None:
+            if not self._loaded:
+                _init_worker(self.parent_path, self.reference_job, self.rank)
+                self._loaded = True
+            if _reference is None:
+                raise FileNotFoundError(f"Missing logs of {self.reference_job}")
+            self.scores.update(zip(settings, map(_score, settings)))
+            return
+
+        chunksize = max(len(settings) // (4 * self.workers), 1)
+        self.scores.update(zip(settings, pool.map(_score, settings, chunksize=chunksize)))
+
+    def make_pool(self):
+        """Starts the worker processes, each loading the reference run once. None if running serially."""
+        if self.workers == 1:
+            return None
+        # spawn fresh interpreters so workers do not inherit pyplot state of this process
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.parent_path, self.reference_job, self.rank),
+        )
+
+    def best(self, count, trigger_types=TRIGGER_TYPES):
+        """Returns the count best scored settings of the given trigger types, fastest first."""
+        ranked = sorted(
+            (setting for setting in self.scores if setting[0] in trigger_types),
+            key=lambda setting: self.scores[setting],
+        )
+        return ranked[:count]
+
+    def run(self, trigger_types=TRIGGER_TYPES, rounds=4, keep=3):
+        """Searches the settings of each trigger type.
+
+        Args:
+            trigger_types (list, optional): Trigger types to search. Defaults to TRIGGER_TYPES.
+            rounds (int, optional): Number of refinement rounds after the initial grid. Defaults to 4.
+            keep (int, optional): Number of best settings per trigger type refined in each round. Defaults to 3.
+
+        Returns:
+            dict: Maps each scored setting (trigger_type, trigger_factor, trigger_n_samples) to its predicted runtime.
+        """
+        print(f"Searching trigger settings for {self.scenario} on {self.reference_job}")
+        pool = self.make_pool()
+        try:
+            self.evaluate(initial_settings(trigger_types), pool)
+
+            factor_step = (FACTOR_BOUNDS[1] - FACTOR_BOUNDS[0]) / 10
+            samples_step = 2.0
+            for i in range(rounds):
+                best = [
+                    setting
+                    for trigger_type in trigger_types
+                    for setting in self.best(keep, [trigger_type])
+                ]
+                self.evaluate(refine_settings(best, factor_step, samples_step), pool)
+                print(f"Round {i + 1}/{rounds}: {len(self.scores)} settings scored")
+                factor_step /= 2
+                samples_step = math.sqrt(samples_step)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.scores
+
+    def promising_jobs(self, count=3, trigger_types=TRIGGER_TYPES):
+        """Turns the best settings of each trigger type into dynamic jobs for pipeline.generate_slurm.
+
+        Settings close to an already chosen one, or scored the same (i.e. triggering at the same iterations), are
+        skipped so that no cluster time is spent on practically identical runs.
+
+        Args:
+            count (int, optional): Number of settings per trigger type. Defaults to 3.
+            trigger_types (list, optional): Trigger types to emit jobs for. Defaults to TRIGGER_TYPES.
+
+        Returns:
+            list: SimulationRun for each setting, named like the jobs in SimulationRun.dynamic_jobs.
+        """
+        jobs = []
+        for trigger_type in trigger_types:
+            chosen = []
+            for setting in self.best(len(self.scores), [trigger_type]):
+                if len(chosen) == count:
+                    break
+                if any(
+                    self.scores[setting] == self.scores[other]
+                    or (
+                        abs(setting[1] - other[1]) < MIN_FACTOR_DISTANCE
+                        and max(setting[2], other[2]) / min(setting[2], other[2])
+                        < MIN_SAMPLES_RATIO
+                    )
+                    for other in chosen
+                ):
+                    continue
+                chosen.append(setting)
+            jobs += [dynamic_job(self.scenario, *setting) for setting in chosen]
+        return jobs
@@ -1,15 +1,16 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class JobCollectionType(Enum):
-    """The type of jobs in a collection. These include static and dynamic tuning intervals, as well as special and optimum runs."""
+    """The type of jobs in a collection. These include static and dynamic tuning intervals, as well as special and optimum runs and dynamic runs found by a trigger search."""
 
     STATIC = 0
     DYNAMIC = 1
     SPECIAL = 2
     OPTIMUM = 3
     STATIC_MPI = 4
+    SEARCH = 5
 
     @staticmethod
     def from_str(label):
@@ -24,6 +25,8 @@ class JobCollectionType(Enum):
                 return JobCollectionType.OPTIMUM
             case "static_mpi":
                 return JobCollectionType.STATIC_MPI
+            case "search":
+                return JobCollectionType.SEARCH
             case _:
                 raise NotImplementedError
 
@@ -108,7 +111,7 @@ class DataLayoutType(Enum):
                 return ""
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class TuningConfig:
     """Represents the configuration of a specific iteration as generated by the iteration logger."""
 
@@ -120,6 +123,7 @@ class TuningConfig:
     data_layout: DataLayoutType
     newton3: bool
     tuning: bool
+    _str: str = field(default=None, init=False, repr=False)
 
     @staticmethod
     def from_strs(functor, interaction, container, csf, traversal, layout, n3, tuning):
@@ -147,11 +151,122 @@ class TuningConfig:
         return self.tuning
 
     def __str__(self):
+        if self._str is not None:
+            return self._str
         # remove prefix to avoid duplication
         trav = self.traversal
         if trav.startswith(str(self.container)):
             trav = trav[len(str(self.container)) + 1 :]
-        return f"{self.container}-{trav.upper()}-{'NoN3L' if not self.newton3 else 'N3L'}-{self.data_layout}-CSF{int(self.cellsize_factor) if self.cellsize_factor.is_integer() else self.cellsize_factor}"
+        self._str = f"{self.container}-{trav.upper()}-{'NoN3L' if not self.newton3 else 'N3L'}-{self.data_layout}-CSF{int(self.cellsize_factor) if self.cellsize_factor.is_integer() else self.cellsize_factor}"
+        return self._str
 
     def __eq__(self, other):
         return str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+# dtype of the per-iteration config codes, limits a run to 65535 distinct configurations as the largest code is
+# reserved for Segments.NO_CONFIG. Given by name, numpy is only imported where configurations are encoded so that
+# generating jobs does not need it
+CONFIG_CODE_DTYPE = "uint16"
+
+
+def factorize_rows(columns):
+    """Finds the distinct rows spanned by equally long columns.
+
+    Args:
+        columns (list): numpy arrays, each holding one field of every row.
+
+    Returns:
+        tuple: int64 array mapping each row to the number of its distinct row, and int64 array with the index of the
+        first occurrence of each distinct row, ordered by first occurrence.
+    """
+    import numpy as np
+
+    n_rows = len(columns[0]) if len(columns) > 0 else 0
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # combine the per-column codes into a single key, compressing it after each column to avoid overflows
+    key = np.zeros(n_rows, dtype=np.int64)
+    for col in columns:
+        values, inverse = np.unique(col, return_inverse=True)
+        key = np.unique(key * len(values) + inverse.ravel(), return_inverse=True)[1]
+
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    # renumber by first occurrence so codes do not depend on sort order of the fields
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[inverse.ravel()], first[order]
+
+
+class ConfigTable:
+    """Interns the configurations of a single run.
+
+    Every distinct configuration is parsed into a TuningConfig once and identified by a small integer code, so
+    iterations only need to store a CONFIG_CODE_DTYPE array. Configurations that print the same (see
+    TuningConfig.__str__) share a code. The tuning flag is not part of a configuration's identity, the interned
+    instances therefore always have tuning=False.
+    """
+
+    __slots__ = ("configs", "strs", "_str_codes", "_raw_codes")
+
+    def __init__(self):
+        self.configs = []
+        self.strs = []
+        self._str_codes = {}
+        self._raw_codes = {}
+
+    def __len__(self):
+        return len(self.configs)
+
+    def __getitem__(self, code):
+        return self.configs[code]
+
+    def code_of(self, config):
+        """Returns the code of an already interned configuration or its string, None if unknown."""
+        return self._str_codes.get(str(config))
+
+    def intern(self, functor, interaction, container, csf, traversal, layout, n3):
+        """Returns the code of the configuration described by the raw log fields, parsing it on first sight."""
+        import numpy as np
+
+        raw = (functor, interaction, container, csf, traversal, layout, n3)
+        code = self._raw_codes.get(raw)
+        if code is not None:
+            return code
+
+        config = TuningConfig.from_strs(*raw, "false")
+        cstr = str(config)
+        code = self._str_codes.get(cstr)
+        if code is None:
+            code = len(self.configs)
+            if code >= np.iinfo(CONFIG_CODE_DTYPE).max:
+                raise OverflowError("Too many distinct configurations for config codes")
+            self.configs.append(config)
+            self.strs.append(cstr)
+            self._str_codes[cstr] = code
+        self._raw_codes[raw] = code
+        return code
+
+    def encode(self, columns):
+        """Maps rows of raw config fields to config codes.
+
+        Args:
+            columns (list): numpy arrays for functor, interaction type, container, cell size factor, traversal,
+                data layout and newton3, in the order of TuningConfig.from_strs.
+
+        Returns:
+            np.ndarray: CONFIG_CODE_DTYPE array with the code of each row.
+        """
+        import numpy as np
+
+        inverse, first = factorize_rows(columns)
+        codes = np.array(
+            [self.intern(*(str(col[i]) for col in columns)) for i in first],
+            dtype=CONFIG_CODE_DTYPE,
+        )
+        return codes[inverse]
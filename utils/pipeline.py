@@ -4,8 +4,8 @@ import subprocess, sys
 from jinja2 import Template
 
 
-from classes.Config import BUILD_DIR, MD_FLEX_BINARY, IS_HPC
-from classes.SimulationRun import static_jobs, dynamic_jobs, single_config_jobs, optimum_jobs
+from classes.Config import BUILD_DIR, MD_FLEX_BINARY, IS_HPC, RESULTS_DB
+from classes.SimulationRun import static_jobs, dynamic_jobs, single_config_jobs, optimum_jobs, scenarios
 from classes.TuningConfig import JobCollectionType
 
 
@@ -47,8 +47,17 @@ def rebuild_autopas(
         cwd=BUILD_DIR,
     )
 
-def generate_slurm(mail, collection_type, collection, use_mpi=False):
-    """Generates a slurm job file to be run on CoolMUC4."""
+def generate_slurm(mail, collection_type, collection, use_mpi=False, results_db=None):
+    """Generates a slurm job file to be run on CoolMUC4.
+
+    Args:
+        mail (str): E-mail that should receive notifications.
+        collection_type (JobCollectionType): Kind of the jobs, names the job file.
+        collection (list): SimulationRuns to run.
+        use_mpi (bool, optional): Whether to run the jobs on 6 MPI ranks. Defaults to False.
+        results_db (str, optional): Results database to record the environment of each job in, see ResultsStore.
+            Defaults to None, recording nothing.
+    """
 
     with open("slurm_template.jinja") as f:
         template = Template(f.read())
@@ -71,17 +80,59 @@ def generate_slurm(mail, collection_type, collection, use_mpi=False):
     with open(f"jobs_{str(collection_type.name).lower()}.slurm", "w") as f:
         f.write(rendered)
 
+    if results_db:
+        # pulls in numpy, only needed here
+        from classes.ResultsStore import ResultsStore
+
+        with ResultsStore(results_db) as store:
+            store.add_runs(collection)
+
+
+def generate_search_slurm(mail, parent_path, count=3, workers=1, results_db=None):
+    """Searches trigger settings on the recorded StaticSimple run of each scenario and generates a slurm job file
+    running only the most promising ones.
+
+    Args:
+        mail (str): E-mail that should receive notifications.
+        parent_path (str): Directory containing the recorded job directories.
+        count (int, optional): Number of settings per scenario and trigger type. Defaults to 3.
+        workers (int, optional): Number of processes scoring settings. Defaults to 1.
+        results_db (str, optional): Results database to record the jobs in, see generate_slurm. Defaults to None.
+    """
+    # pulls in numpy and the log readers, only needed here
+    from classes.TriggerSearch import TriggerSearch
+
+    jobs = []
+    for scenario in scenarios:
+        search = TriggerSearch(
+            parent_path, f"{scenario}_dynamic_StaticSimple_1.0_10", workers=workers
+        )
+        search.run()
+        jobs += search.promising_jobs(count)
+    generate_slurm(mail, JobCollectionType.SEARCH, jobs, True, results_db)
+
 
 def main():
-    # generate a slurm job
-    if len(sys.argv) < 2:
+    # generate a slurm job, with --register the jobs are also recorded in the results database RESULTS_DB
+    args = [arg for arg in sys.argv[1:] if arg != "--register"]
+    results_db = None
+    if len(args) < len(sys.argv) - 1:
+        if not RESULTS_DB:
+            print("Please configure RESULTS_DB to register the jobs")
+            exit(1)
+        results_db = RESULTS_DB
+    if len(args) < 1:
         print("Please provide an e-mail that should receive notifications")
         exit(1)
 
-    generate_slurm(sys.argv[1], JobCollectionType.STATIC, static_jobs)
-    generate_slurm(sys.argv[1], JobCollectionType.DYNAMIC, dynamic_jobs, True)
-    generate_slurm(sys.argv[1], JobCollectionType.OPTIMUM, optimum_jobs)
-    generate_slurm(sys.argv[1], JobCollectionType.SPECIAL, single_config_jobs)
+    generate_slurm(args[0], JobCollectionType.STATIC, static_jobs, results_db=results_db)
+    generate_slurm(args[0], JobCollectionType.DYNAMIC, dynamic_jobs, True, results_db)
+    generate_slurm(args[0], JobCollectionType.OPTIMUM, optimum_jobs, results_db=results_db)
+    generate_slurm(args[0], JobCollectionType.SPECIAL, single_config_jobs, results_db=results_db)
+
+    # optionally search trigger settings on recorded runs, e.g. PLOT_DATA/output
+    if len(args) > 1:
+        generate_search_slurm(args[0], args[1], results_db=results_db)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,25 @@
 #!/usr/bin/python
 
+import argparse
 import csv
+import multiprocessing
 import os
 import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from classes.Config import PLOT_DATA_DIR
-from classes.PlotData import PlotData
+import numpy as np
+
+from classes.Config import CONFIG_DIR, PLOT_DATA_DIR, RESULTS_DB
+from classes.ChangePoints import match_triggers
+from classes.FigureCache import input_fingerprints, is_up_to_date, record_figure
+from classes.JitterFilter import load_jitter_filter, thermostat_config
+from classes.JobLog import TOTAL_TIMER, collect_job_summaries, write_job_summaries
+from classes.MultiRankRun import MultiRankRun, rank_ids
+from classes.ResultsStore import ResultsStore
+from classes.PlotData import PlotData, load_run
+from classes.TriggerReplay import TRIGGER_TYPES, replay_log, replay_triggers
 
 
 def clean_up_files(abs_path):
@@ -40,25 +53,65 @@ def clean_up_files(abs_path):
     return skip
 
 
-def estimate_tuning_triggers(param_name, iteration_log, factor):
-    with open(iteration_log, newline="") as csvfile:
-        reader = csv.DictReader(csvfile, delimiter=",")
-        rows = list(reader)
-
-        param = [int(row[param_name]) for row in rows]
-
-        timestamps = []
-        for i in range(1, len(param)):
-            if param[i] >= factor * param[i - 1]:
-                timestamps += [i]
-
-        print(
-            f"TimeBasedSimple dynamic tuning with a retuning factor of {factor} would have lead to an estimated {len(timestamps)} tuning triggers at times {timestamps}"
-        )
-
-
-def collect_runtimes(parent_path, output_name):
-    """Collects the total runtimes for all jobs in parent_path"""
+def estimate_tuning_triggers(
+    iteration_log, trigger_type, trigger_factor, trigger_n_samples=1
+):
+    """Replays a dynamic trigger on a recorded iteration log and reports when it would have triggered tuning.
+
+    Args:
+        iteration_log (str): Path to the iteration log.
+        trigger_type (str): One of the dynamic trigger types in TriggerReplay.TRIGGER_TYPES.
+        trigger_factor (float): The trigger factor.
+        trigger_n_samples (int, optional): The number of samples. Defaults to 1.
+
+    Returns:
+        np.ndarray: Iterations in which the trigger fires.
+    """
+    timestamps = replay_log(
+        iteration_log, trigger_type, trigger_factor, trigger_n_samples
+    )
+    print(
+        f"{trigger_type} dynamic tuning with a retuning factor of {trigger_factor} and {trigger_n_samples} samples would have lead to an estimated {len(timestamps)} tuning triggers at iterations {timestamps.tolist()}"
+    )
+    return timestamps
+
+
+def predict_total_runtime(reference, reference_total, job):
+    """Predicts the total runtime of a dynamic job by replaying its trigger on a reference run.
+
+    Args:
+        reference (PlotData): Run tuning in fixed intervals, recorded for the same scenario.
+        reference_total (int): Total accumulated runtime of the reference run in ns.
+        job (str): Name of the dynamic job, encoding its trigger type, factor and number of samples.
+
+    Returns:
+        int: Predicted total accumulated runtime in ns.
+    """
+    tokens = job.split("_")
+    trigger_type = tokens[2]
+    if trigger_type not in TRIGGER_TYPES:
+        # tunes in fixed intervals like the reference
+        return reference_total
+
+    triggers = replay_triggers(
+        reference.raw_runtime,
+        reference.tune,
+        trigger_type,
+        float(tokens[3]),
+        int(tokens[4]),
+    )
+    prediction = reference.predict_runtime(triggers)
+    return round(reference_total + prediction["predicted"] - prediction["recorded"])
+
+
+def collect_runtimes(parent_path, output_name, workers=16):
+    """Collects the total runtimes for all jobs in parent_path
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        output_name (str): Path of the .csv to write the runtimes to.
+        workers (int, optional): Number of threads reading the job logs. Defaults to 16.
+    """
 
     print("Collecting runtimes")
     iterations = {
@@ -66,62 +119,55 @@ def collect_runtimes(parent_path, output_name):
         "exploding-liquid": 150000,
         "heating-sphere": 60000,
     }
+    summaries = collect_job_summaries(parent_path, workers)
+    total_field = f"{TOTAL_TIMER}[ns]"
+    totals = (
+        dict(zip(summaries["job"].tolist(), summaries[total_field].tolist()))
+        if total_field in summaries.dtype.names
+        else {}
+    )
     data = {}
-    baseline = {}
-    
-    # collect baseline runs
-    for job in os.listdir(parent_path):
-        if not os.path.isdir(os.path.join(parent_path, job)):
-            continue
-        log = os.path.join(os.path.join(parent_path, job), "job_log.txt")
-        if not os.path.isfile(log):
-            continue
+    references = {}
+    missing_baselines = set()
 
-        if not "static" in job.lower():
+    for summary in summaries:
+        job = str(summary["job"])
+        if not "dynamic" in job and not "static" in job.lower():
             continue
-        
         scenario = next((s for s in iterations.keys() if s in job), "")
-
-        with open(log, "r") as logfile:
-            lines = logfile.readlines()
-            line = "".join(lines[len(lines) - 26 :])
-            runtime = re.search(r"Total accumulated\s*:\s([0-9]+)", line)
-            runtime = -1 if runtime is None else int(runtime.group(1))
-            tuning_its = re.search(r"Tuning iterations\s*:\s*(\d+)", line)
-            tuning_its = -1 if tuning_its is None else int(tuning_its.group(1))
-            tuning_its_perc = round(tuning_its/iterations[scenario]*100, 2)
-            data[job] = {"runtime": runtime, "tuning_its": tuning_its, "runtime_speedup_perc": 0, "tuning_its_perc" : tuning_its_perc, "runtime_delta_abs": 0, "runtime_delta_abs_it" : 0}
-            if runtime == -1 or tuning_its == -1:
-                print(f"Incomplete job: {job}")
-
-    # collect dynamic runs
-    for job in os.listdir(parent_path):
-        if not os.path.isdir(os.path.join(parent_path, job)):
-            continue
-        log = os.path.join(os.path.join(parent_path, job), "job_log.txt")
-        if not os.path.isfile(log):
-            continue
+        n_its = int(summary["iterations"]) if summary["iterations"] > 0 else iterations[scenario]
+        runtime = totals.get(job, -1)
+        tuning_its = int(summary["tuning_its"])
+        tuning_its_perc = round(tuning_its/n_its*100, 2)
+        if runtime == -1 or tuning_its == -1:
+            print(f"Incomplete job: {job}")
 
         if not "dynamic" in job:
+            data[job] = {"runtime": runtime, "predicted_runtime": runtime, "tuning_its": tuning_its, "runtime_speedup_perc": 0, "tuning_its_perc" : tuning_its_perc, "runtime_delta_abs": 0, "runtime_delta_abs_it" : 0}
             continue
 
-        scenario = next((s for s in iterations.keys() if s in job), "")
-
-        with open(log, "r") as logfile:
-            lines = logfile.readlines()
-            line = "".join(lines[len(lines) - 26 :])
-            runtime = re.search(r"Total accumulated\s*:\s([0-9]+)", line)
-            runtime = -1 if runtime is None else int(runtime.group(1))
-            runtime_baseline = data[f"{scenario}_dynamic_StaticSimple_1.0_10"]["runtime"]
+        baseline_job = f"{scenario}_dynamic_StaticSimple_1.0_10"
+        runtime_baseline = totals.get(baseline_job, -1)
+        if runtime_baseline == -1 and baseline_job not in missing_baselines:
+            print(f"Missing baseline {baseline_job}, writing -1 as speedup and deltas of its scenario")
+            missing_baselines.add(baseline_job)
+        if runtime == -1 or runtime_baseline == -1:
+            # nothing to compare, mark the derived columns like missing measurements
+            runtime_perc = runtime_delta_abs = runtime_delta_abs_it = -1
+        else:
             runtime_perc = round((runtime_baseline/runtime -1)*100, 0)
             runtime_delta_abs = round(runtime-runtime_baseline,0)
-            runtime_delta_abs_it = round(runtime_delta_abs/iterations[scenario], 0)
-            tuning_its = re.search(r"Tuning iterations\s*:\s*(\d+)", line)
-            tuning_its = -1 if tuning_its is None else int(tuning_its.group(1))
-            tuning_its_perc = round(tuning_its/iterations[scenario]*100, 2)
-            data[job] = {"runtime": runtime, "tuning_its": tuning_its, "runtime_speedup_perc": runtime_perc, "tuning_its_perc" : tuning_its_perc, "runtime_delta_abs": runtime_delta_abs, "runtime_delta_abs_it": runtime_delta_abs_it}
-            if runtime == -1 or tuning_its == -1:
-                print(f"Incomplete job: {job}")
+            runtime_delta_abs_it = round(runtime_delta_abs/n_its, 0)
+
+        # predict the runtime from the logs of the baseline to check the estimator against the measurement
+        if baseline_job not in references:
+            references[baseline_job] = load_run(parent_path, baseline_job)
+        predicted_runtime = -1
+        if references[baseline_job] is not None and runtime_baseline != -1:
+            predicted_runtime = predict_total_runtime(
+                references[baseline_job], runtime_baseline, job
+            )
+        data[job] = {"runtime": runtime, "predicted_runtime": predicted_runtime, "tuning_its": tuning_its, "runtime_speedup_perc": runtime_perc, "tuning_its_perc" : tuning_its_perc, "runtime_delta_abs": runtime_delta_abs, "runtime_delta_abs_it": runtime_delta_abs_it}
 
     def sort_fn(k):
         parts = k.split("_")
@@ -134,29 +180,399 @@ def collect_runtimes(parent_path, output_name):
     with open(output_name, "w", newline="") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(
-            ["job", "total_runtime", "tuning_iterations", "runtime_speedup_perc", "tuning_its_perc", "runtime_delta_abs", "runtime_delta_abs_it"]
+            ["job", "total_runtime", "predicted_runtime", "tuning_iterations", "runtime_speedup_perc", "tuning_its_perc", "runtime_delta_abs", "runtime_delta_abs_it"]
         )
         for job, d in data.items():
-            writer.writerow([job, d["runtime"], d["tuning_its"], d["runtime_speedup_perc"], d["tuning_its_perc"], d["runtime_delta_abs"], d["runtime_delta_abs_it"]])
+            writer.writerow([job, d["runtime"], d["predicted_runtime"], d["tuning_its"], d["runtime_speedup_perc"], d["tuning_its_perc"], d["runtime_delta_abs"], d["runtime_delta_abs_it"]])
+
+
+def evaluate_triggers(parent_path, output_name, max_lag=5000):
+    """Compares the tuning phases of all dynamic jobs in parent_path against the oracle retuning iterations.
+
+    The oracle is found by change point detection on the runtime of the StaticSimple baseline of each scenario, as
+    the simulation itself evolves the same in all jobs of a scenario.
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        output_name (str): Path of the .csv to write the lag and false positives of each job to.
+        max_lag (int, optional): Maximum number of iterations a trigger may lag behind an oracle iteration.
+            Defaults to 5000, the tuning interval of the static runs.
+    """
+    print("Evaluating triggers against oracle")
+    oracles = {}
+    rows = []
+    for job in sorted(os.listdir(parent_path)):
+        if not "dynamic" in job or "StaticSimple" in job:
+            continue
+        scenario = job.split("_")[0]
+        if scenario not in oracles:
+            baseline = load_run(parent_path, f"{scenario}_dynamic_StaticSimple_1.0_10")
+            oracles[scenario] = None if baseline is None else baseline.oracle_retuning_its()
+        run = load_run(parent_path, job)
+        if oracles[scenario] is None or run is None:
+            print(f"Incomplete job: {job}")
+            continue
+
+        # the initial tuning phase is not triggered
+        triggers = run.phases["start"][1:]
+        result = match_triggers(oracles[scenario], triggers, max_lag)
+        lags = result["lags"]
+        rows.append(
+            [
+                job,
+                len(oracles[scenario]),
+                len(triggers),
+                len(lags),
+                result["missed"],
+                result["false_positives"],
+                round(lags.mean(), 0) if len(lags) > 0 else -1,
+                round(np.median(lags), 0) if len(lags) > 0 else -1,
+            ]
+        )
+
+    with open(output_name, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(
+            ["job", "oracle_its", "triggers", "matched", "missed", "false_positives", "mean_lag", "median_lag"]
+        )
+        writer.writerows(rows)
+
+
+def evaluate_ranks(parent_path, workers=1):
+    """Writes the rank summary of every job in parent_path run on more than one rank.
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        workers (int, optional): Number of processes reading the logs of a job. Defaults to 1.
+    """
+    for job in sorted(os.listdir(parent_path)):
+        abs_path = os.path.join(parent_path, job)
+        if not os.path.isdir(abs_path) or len(rank_ids(abs_path)) < 2:
+            continue
+        run = MultiRankRun(job, abs_path, workers=workers)
+        run.write_rank_summary(os.path.join(abs_path, "rank_summary"))
+
+
+def store_results(parent_path, db_file, with_phases=True):
+    """Adds the job log summaries and tuning phases of all jobs in parent_path to the results database.
+
+    Args:
+        parent_path (str): Directory containing the job directories.
+        db_file (str): Path of the results database.
+        with_phases (bool, optional): Whether to load the logs of every rank to store its tuning phases.
+            Defaults to True.
+    """
+    print("Storing results")
+    with ResultsStore(db_file) as store:
+        store.add_summaries(collect_job_summaries(parent_path))
+        if not with_phases:
+            return
+        for job in sorted(os.listdir(parent_path)):
+            abs_path = os.path.join(parent_path, job)
+            if not os.path.isdir(abs_path):
+                continue
+            for rank in rank_ids(abs_path):
+                run = load_run(parent_path, job, rank)
+                if run is not None:
+                    store.add_phases(run)
+
+
+def job_figures(rank):
+    """Returns the figures plot_job renders for a rank, all named after the rank so that ranks never overwrite each
+    other's figures.
+
+    Args:
+        rank (int): MPI rank whose logs to plot.
+
+    Returns:
+        list: (name, PlotData method, keyword arguments) of each figure. The figure is written to name.<ext> in the
+        job directory, output_prefix is given relative to it.
+    """
+    return [
+        # (f"runtime_Rank{rank}", "plot_iteration_runtime", {"output_prefix": f"runtime_Rank{rank}", "mark_configs": False, "mark_tuning_phases": False}),
+        # (f"runtime_mark_tuning_Rank{rank}", "plot_iteration_runtime", {"output_prefix": f"runtime_mark_tuning_Rank{rank}", "mark_configs": False}),
+        (f"configs_Rank{rank}", "plot_iteration_runtime", {"output_prefix": f"configs_Rank{rank}"}),
+        (f"configs_rebuild_Rank{rank}", "plot_rebuild_times", {"output_prefix": f"configs_rebuild_Rank{rank}"}),
+        # (f"configs_nomark_Rank{rank}", "plot_iteration_runtime", {"output_prefix": f"configs_nomark_Rank{rank}", "mark_tuning_phases": False}),
+        (
+            f"liveinfo_Rank{rank}_maxDensity",
+            "plot_liveinfo_params",
+            {
+                # "avgParticlesPerCell", "estimatedNumNeighborInteractions", "particlesPerCellStdDev", "numEmptyCells"
+                "param_names": ["maxDensity"],
+                "output_prefix": f"liveinfo_Rank{rank}_",
+                "mark_configs": False,
+            },
+        ),
+    ]
+
+
+def job_inputs(abs_path, rank, jitter_filter=None):
+    """Returns the files the figures of a rank are made from."""
+    inputs = [
+        os.path.join(abs_path, f"iterationLog_Rank{rank}.csv"),
+        os.path.join(abs_path, f"liveinfoLog_Rank{rank}.csv"),
+        os.path.join(abs_path, f"tuningLog_Rank{rank}.txt"),
+    ]
+    if jitter_filter is not None:
+        # holds the thermostat interval, the same file PlotData.filter_jitter reads
+        scenario = os.path.basename(os.path.normpath(abs_path)).split("_")[0]
+        inputs.append(thermostat_config(abs_path, scenario, CONFIG_DIR))
+    return inputs
+
+
+def figure_params(job_dir, rank, range_start, range_end, jitter_filter, decimate, method, kwargs):
+    """Collects everything besides the inputs and the plot code that decides what a figure of plot_job shows."""
+    return {
+        "job": job_dir,
+        "rank": rank,
+        "range": [range_start, range_end],
+        "jitter_filter": None if jitter_filter is None else vars(jitter_filter),
+        "decimate": decimate,
+        "method": method,
+        "kwargs": kwargs,
+    }
+
+
+def stale_figures(
+    job_dir,
+    abs_path,
+    rank,
+    range_start=0,
+    range_end=sys.maxsize,
+    jitter_filter=None,
+    decimate=False,
+    profile="publication",
+):
+    """Returns the figures of job_figures whose inputs, parameters or plot code changed since they were rendered.
+
+    See plot_job for the arguments, profile is the render profile the figures are rendered in.
+    """
+    inputs = job_inputs(abs_path, rank, jitter_filter)
+    return [
+        (name, method, kwargs)
+        for name, method, kwargs in job_figures(rank)
+        if not is_up_to_date(
+            os.path.join(abs_path, name),
+            inputs,
+            figure_params(job_dir, rank, range_start, range_end, jitter_filter, decimate, method, kwargs),
+            profile,
+        )
+    ]
+
+
+def plot_job(
+    job_dir,
+    abs_path,
+    rank,
+    range_start=0,
+    range_end=sys.maxsize,
+    jitter_filter=None,
+    decimate=False,
+    incremental=False,
+):
+    """Parses the logs of a single rank of a job and renders its figures.
+
+    Every figure records a fingerprint of its inputs and parameters next to the logs, see FigureCache.
+
+    Args:
+        job_dir (str): Name of the job directory, used as job name.
+        abs_path (str): Absolute path of the job directory, ending with a slash.
+        rank (int): MPI rank whose logs to plot.
+        range_start (int, optional): Start of iteration range to plot. Defaults to 0.
+        range_end (int, optional): End of iteration range to plot. Defaults to sys.maxsize.
+        jitter_filter (JitterFilter, optional): Filter for noisy runtimes, see PlotData. Defaults to None.
+        decimate (bool, optional): Whether to only draw the points visible in the png, see PlotData. Defaults to False.
+        incremental (bool, optional): Whether to only render the figures whose fingerprint changed. Defaults to False.
+    """
+    from classes import PlotStyle
+
+    profile = PlotStyle.render_profile
+    if incremental:
+        figures = stale_figures(
+            job_dir, abs_path, rank, range_start, range_end, jitter_filter, decimate, profile
+        )
+    else:
+        figures = job_figures(rank)
+    if len(figures) == 0:
+        print(f"Figures of {job_dir} rank {rank} are up to date")
+        return
+
+    inputs = job_inputs(abs_path, rank, jitter_filter)
+    # taken before reading the logs, so a log changing meanwhile renders the figure again next time
+    sources = input_fingerprints(inputs)
+    iteration_log, liveinfo_log, tuning_log = inputs[:3]
+
+    # with PlotData(job_dir, liveinfo_log, iteration_log, tuning_log, 5000, 20000) as plot_instance:
+    with PlotData(
+        job_dir,
+        liveinfo_log,
+        iteration_log,
+        tuning_log,
+        rank,
+        range_start,
+        range_end,
+        jitter_filter=jitter_filter,
+        decimate=decimate,
+    ) as plot_instance:
+        for name, method, kwargs in figures:
+            getattr(plot_instance, method)(
+                **{**kwargs, "output_prefix": abs_path + kwargs["output_prefix"]}
+            )
+            record_figure(
+                os.path.join(abs_path, name),
+                sources,
+                figure_params(job_dir, rank, range_start, range_end, jitter_filter, decimate, method, kwargs),
+                profile,
+            )
+
+        # plot_instance.write_tuning_results(abs_path + "tuning_results")
+        # plot_instance.write_liveinfo_triggers(abs_path + "liveinfo_triggers")
+
+        # if not "static" in job_dir.lower():
+        #     plot_instance.compare_tuning_results(
+        #         out_dir_path
+        #         + job_dir.split("_")[0]
+        #         + "_dynamic_StaticSimple_1.0_10/tuning_results.csv",
+        #         # + "_dynamic_StaticSimple_1.0_10_onlyforstaticconfigs/tuning_results.csv",
+        #         abs_path + "tuning_histogramm",
+        #     )
+
+
+def init_worker(profile="publication"):
+    """Gives each worker process its own non-interactive matplotlib state in the given render profile."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from classes.PlotStyle import use_render_profile
+
+    use_render_profile(profile)
+
+
+def run_task(task):
+    """Runs plot_job for a (job_dir, abs_path, rank, range_start, range_end, ...) task, returning the time it took.
+    Further entries of the task are passed on as the remaining arguments of plot_job."""
+    start = time.perf_counter()
+    try:
+        plot_job(*task)
+    finally:
+        # do not leak figures into the next task of this worker
+        import matplotlib.pyplot as plt
+
+        plt.close("all")
+    return time.perf_counter() - start
+
+
+def run_tasks(tasks, workers=1, profile="publication"):
+    """Runs plot tasks serially or spread over a process pool, streaming progress.
+
+    Args:
+        tasks (list): Argument tuples of plot_job, starting with (job_dir, abs_path, rank, range_start, range_end).
+        workers (int, optional): Number of worker processes, 1 runs all tasks in this process. Defaults to 1.
+        profile (str, optional): Render profile of the plots, see PlotStyle.RENDER_PROFILES. Defaults to
+            "publication".
+
+    Returns:
+        list: (job_dir, rank, error) for each task that failed.
+    """
+    failures = []
+    if len(tasks) == 0:
+        return failures
+
+    def report(i, task, runtime=None, error=None):
+        status = f"done in {runtime:.1f}s" if error is None else f"FAILED: {error!r}"
+        print(f"[{i}/{len(tasks)}] {task[0]} rank {task[2]} {status}", flush=True)
+        if error is not None:
+            failures.append((task[0], task[2], error))
+
+    if workers == 1:
+        # only now load the plotting stack, the other commands of this module do not need it
+        from classes.PlotStyle import use_render_profile
+
+        use_render_profile(profile)
+        for i, task in enumerate(tasks, 1):
+            try:
+                report(i, task, run_task(task))
+            except Exception as e:
+                report(i, task, error=e)
+        return failures
+
+    # spawn fresh interpreters so workers do not inherit pyplot state of this process
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(profile,),
+    ) as pool:
+        futures = {pool.submit(run_task, task): task for task in tasks}
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                report(i, futures[future], future.result())
+            except Exception as e:
+                report(i, futures[future], error=e)
+    return failures
 
 
 def main():
-    range_start = 0
-    range_end = sys.maxsize
-    if len(sys.argv) == 2:
-        all_dirs = [sys.argv[1]]
-        print(all_dirs)
-    elif len(sys.argv) == 4:
-        all_dirs = [sys.argv[1]]
-        range_start = int(sys.argv[2])
-        range_end = int(sys.argv[3])
+    parser = argparse.ArgumentParser(description="Plot the logs of md-flexible runs.")
+    parser.add_argument(
+        "job_dir", nargs="?", help="job to plot, defaults to all jobs in PLOT_DATA/output"
+    )
+    parser.add_argument("range_start", nargs="?", type=int, default=0)
+    parser.add_argument("range_end", nargs="?", type=int, default=sys.maxsize)
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes, 0 uses all cores (default: 1)",
+    )
+    parser.add_argument(
+        "--all-ranks",
+        action="store_true",
+        help="plot the logs of every MPI rank instead of rank 0 only",
+    )
+    parser.add_argument(
+        "--draft",
+        action="store_true",
+        help="render png only with mathtext instead of LaTeX, for quickly triaging a sweep",
+    )
+    parser.add_argument(
+        "--decimate",
+        action="store_true",
+        help="only draw the points of scatter plots visible at the resolution of the png",
+    )
+    parser.add_argument(
+        "--jitter-filter",
+        metavar="YAML",
+        help="mask runtimes distorted by noise, with the JitterFilter arguments given in the yaml file",
+    )
+    parser.add_argument(
+        "-B",
+        "--force",
+        action="store_true",
+        help="render all figures, also those whose logs and parameters did not change since they were rendered",
+    )
+    args = parser.parse_args()
+
+    range_start = args.range_start
+    range_end = args.range_end
+    profile = "draft" if args.draft else "publication"
+    jitter_filter = None if args.jitter_filter is None else load_jitter_filter(args.jitter_filter)
+    if args.job_dir is not None:
+        all_dirs = [args.job_dir]
         print(all_dirs)
     else:
         all_dirs = os.listdir(os.path.join(PLOT_DATA_DIR, "output"))
 
     # dir = os.path.join(PLOT_DATA_DIR, "output")
     # collect_runtimes(dir, os.path.join(dir, "runtimes.csv"))
+    # write_job_summaries(collect_job_summaries(dir), os.path.join(dir, "timers"))
+    # evaluate_triggers(dir, os.path.join(dir, "trigger_oracle.csv"))
+    # evaluate_ranks(dir, workers=6)
+    # store_results(dir, RESULTS_DB)
 
+    tasks = []
     for job_dir in all_dirs:
         print(f"Working on {job_dir}")
         out_dir_path = os.path.join(PLOT_DATA_DIR, "output") + "/"
@@ -164,64 +580,26 @@ def main():
 
         if not os.path.isdir(abs_path):
             continue
-        skip = clean_up_files(abs_path)
-        # if skip:
-        #     continue
+        clean_up_files(abs_path)
 
-        # ranks = range(6) if "exploding-liquid" in job_dir else [0]
-        ranks = [0]
-        
+        ranks = rank_ids(abs_path) if args.all_ranks else [0]
 
         for rank in ranks:
-            iteration_log = os.path.join(abs_path, f"iterationLog_Rank{rank}.csv")
-            liveinfo_log = os.path.join(abs_path, f"liveinfoLog_Rank{rank}.csv")
-            tuning_log = os.path.join(abs_path, f"tuningLog_Rank{rank}.txt")
-
-            # with PlotData(job_dir, liveinfo_log, iteration_log, tuning_log, 5000, 20000) as plot_instance:
-            with PlotData(
-                job_dir,
-                liveinfo_log,
-                iteration_log,
-                tuning_log,
-                rank,
-                range_start,
-                range_end,
-            ) as plot_instance:
-                # plot_instance.plot_iteration_runtime(abs_path + "runtime", mark_configs=False, mark_tuning_phases=False)
-                # plot_instance.plot_iteration_runtime(
-                #     abs_path + "runtime_mark_tuning", mark_configs=False
-                # )
-
-                plot_instance.plot_iteration_runtime(abs_path + "configs_Rank"+str(rank))
-                plot_instance.plot_rebuild_times(abs_path + "configs_rebuild")
-                # plot_instance.plot_iteration_runtime(
-                #     abs_path + "configs_nomark", mark_tuning_phases=False
-                # )
-
-                plot_instance.plot_liveinfo_params(
-                    [
-                        # "avgParticlesPerCell",
-                        # "estimatedNumNeighborInteractions",
-                        "maxDensity",
-                        # "particlesPerCellStdDev",
-                        # "numEmptyCells",
-                    ],
-                    abs_path + f"liveinfo_",
-                    mark_configs=False
-                )
-
-                # plot_instance.write_tuning_results(abs_path + "tuning_results")
-
-                # if not "static" in job_dir.lower():
-                #     plot_instance.compare_tuning_results(
-                #         out_dir_path
-                #         + job_dir.split("_")[0]
-                #         + "_dynamic_StaticSimple_1.0_10/tuning_results.csv",
-                #         # + "_dynamic_StaticSimple_1.0_10_onlyforstaticconfigs/tuning_results.csv",
-                #         abs_path + "tuning_histogramm",
-                #     )
-
-    # estimate_tuning_triggers("computeInteractionsTotal[ns]", abs_path+ "iterationLog.csv", 45.0)
+            task = (job_dir, abs_path, rank, range_start, range_end, jitter_filter, args.decimate)
+            if not args.force and len(stale_figures(*task, profile)) == 0:
+                print(f"Figures of {job_dir} rank {rank} are up to date")
+                continue
+            tasks.append(task + (not args.force,))
+
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    failures = run_tasks(tasks, workers, profile)
+
+    if len(failures) > 0:
+        print(f"{len(failures)} of {len(tasks)} plot tasks failed:")
+        for job_dir, rank, error in failures:
+            print(f"  {job_dir} rank {rank}: {error!r}")
+
+    # estimate_tuning_triggers(abs_path + "iterationLog.csv", "TimeBasedSimple", 45.0)
 
 
 if __name__ == "__main__":
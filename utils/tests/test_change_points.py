@@ -0,0 +1,78 @@
+import os, sys, time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.ChangePoints import (
+    binary_segmentation,
+    change_points,
+    default_penalty,
+    match_triggers,
+    paying_change_points,
+    pelt,
+)
+
+
+def step_series(n, points, height=1e5, noise=1e4, seed=1):
+    """Runtime-like series of n samples around 1e6 ns, alternately stepping up and down at points."""
+    rng = np.random.default_rng(seed)
+    x = 1e6 + rng.normal(0, noise, n)
+    for i, point in enumerate(points):
+        x[point:] += height if i % 2 == 0 else -height
+    return x
+
+
+def test_pelt_matches_binary_segmentation_on_steps():
+    points = np.array([300, 1000, 1700, 2500])
+    x = step_series(3000, points)
+    penalty = default_penalty(x)
+    np.testing.assert_array_equal(binary_segmentation(x, penalty, 10), points)
+    np.testing.assert_array_equal(pelt(x, penalty, 10), points)
+
+
+def test_grid_pelt_refines_steps_between_grid_positions():
+    points = np.array([301, 1003, 1707, 2509])
+    x = step_series(3000, points)
+    np.testing.assert_array_equal(pelt(x, default_penalty(x), 10, step=16), points)
+
+
+def test_pelt_with_breaks_on_150k_samples():
+    n = 150000
+    points = np.arange(7000, n, 9000)
+    breaks = np.arange(5000, n, 5000)
+    x = step_series(n, points)
+
+    start = time.perf_counter()
+    found = change_points(x, method="pelt", min_size=50, breaks=breaks)
+    elapsed = time.perf_counter() - start
+
+    # steps on a break are not change points of a segment
+    np.testing.assert_array_equal(found, points[~np.isin(points, breaks)])
+    np.testing.assert_array_equal(found, change_points(x, method="binseg", min_size=50, breaks=breaks))
+    assert elapsed < 1.0
+
+
+def test_paying_change_points_drops_small_savings():
+    points = np.array([1000, 2000])
+    x = step_series(3000, points, noise=0)
+    # the second step saves 1e5 ns for 1000 iterations
+    np.testing.assert_array_equal(paying_change_points(x, points, 0.5e8), points)
+    np.testing.assert_array_equal(paying_change_points(x, points, 2e8), np.zeros(0))
+
+
+def test_match_triggers_lags_misses_and_false_positives():
+    oracle = [1000, 5000, 9000, 20000]
+    triggers = [500, 1200, 1300, 5000, 16000]
+    result = match_triggers(oracle, triggers, max_lag=5000)
+    # 1000 -> 1200 and 5000 -> 5000, 16000 lags 9000 by more than max_lag and nothing follows 20000
+    np.testing.assert_array_equal(result["lags"], [200, 0])
+    assert result["missed"] == 2
+    assert result["false_positives"] == 3
+
+
+def test_match_triggers_uses_each_trigger_once():
+    result = match_triggers([100, 200], [250], max_lag=500)
+    np.testing.assert_array_equal(result["lags"], [150])
+    assert result["missed"] == 1
+    assert result["false_positives"] == 0
@@ -0,0 +1,37 @@
+import os, sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.Decimation import minmax_decimate
+
+
+def test_keeps_extremes_of_each_column():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[123] = 5
+    y[456] = -5
+    kept = minmax_decimate(x, y, columns=10)
+    assert 123 in kept and 456 in kept
+    assert len(kept) <= 2 * 10
+
+
+def test_keeps_samples_around_breaks():
+    x = np.arange(1000)
+    kept = minmax_decimate(x, np.ones(1000), columns=10, breaks=[333])
+    assert 332 in kept and 333 in kept
+
+
+def test_all_nan_series_keeps_only_breaks():
+    kept = minmax_decimate(np.arange(5000), np.full(5000, np.nan), columns=100, breaks=[2500])
+    np.testing.assert_array_equal(kept, [2499, 2500])
+    assert len(minmax_decimate(np.arange(5000), np.full(5000, np.nan), columns=100)) == 0
+
+
+def test_all_nan_columns_are_skipped():
+    y = np.arange(5000, dtype=float)
+    y[:2500] = np.nan
+    kept = minmax_decimate(np.arange(5000), y, columns=100)
+    assert kept.min() >= 2500
+    assert 2500 in kept and 4999 in kept
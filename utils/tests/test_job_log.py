@@ -0,0 +1,49 @@
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.JobLog import TOTAL_TIMER, parse_job_summary, read_job_summary
+
+TIMER_BLOCK = """Measurements:
+Total accumulated                 :   61000000270 ns (  61.000s) =  100.0%
+  Initialization                  :      1200000 ns (   0.001s) =    0.0%
+  Simulate                        :   60000000000 ns (  60.000s) =   99.9%
+    ForceUpdateTotal              :   55000000000 ns (  55.000s) =   91.6%
+      Tuning                      :    5000000000 ns (   5.000s) =    9.0%
+      NonTuning                   :   50000000000 ns (  50.000s) =   91.0%
+    RebuildNeighborLists          :     900000000 ns (   0.900s) =    1.5%
+  Output                          :       5000000 ns (   0.005s) =    0.0%
+One iteration                     :       1000000 ns (   0.001s)
+
+Tuning iterations                  : 570 / 60000 = 1%
+MFUPs/sec                          : 12.5
+"""
+
+
+def test_parses_nested_timers():
+    timers = parse_job_summary(TIMER_BLOCK)["timers"]
+    assert timers[TOTAL_TIMER] == 61000000270
+    assert timers[f"{TOTAL_TIMER}/Simulate/ForceUpdateTotal/Tuning"] == 5000000000
+    # a timer less indented than the previous one closes its nested timers
+    assert timers[f"{TOTAL_TIMER}/Simulate/RebuildNeighborLists"] == 900000000
+    assert timers[f"{TOTAL_TIMER}/Output"] == 5000000
+    assert timers["One iteration"] == 1000000
+    assert len(timers) == 9
+
+
+def test_parses_tuning_iterations_and_mfups():
+    summary = parse_job_summary(TIMER_BLOCK)
+    assert summary["tuning_its"] == 570
+    assert summary["iterations"] == 60000
+    assert summary["mfups"] == 12.5
+
+
+def test_missing_values_are_minus_one():
+    summary = parse_job_summary("Iteration 100 of 60000\n")
+    assert summary == {"timers": {}, "tuning_its": -1, "iterations": -1, "mfups": -1.0}
+
+
+def test_reads_last_timer_block_of_a_long_log(tmp_path):
+    log_file = tmp_path / "job_log.txt"
+    log_file.write_text("Iteration 100 progress\n" * 5000 + TIMER_BLOCK.replace("570", "1") + TIMER_BLOCK)
+    assert read_job_summary(str(log_file))["tuning_its"] == 570
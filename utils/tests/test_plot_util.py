@@ -0,0 +1,128 @@
+import os, sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plot_util
+from classes.PlotData import load_run
+
+JOB = "exploding-liquid_dynamic_TimeBasedRegression_1.5_500"
+
+CONFIGS = [
+    ("LinkedCells", "1.000000", "lc_c08", "AoS", "enabled"),
+    ("VerletLists", "1.000000", "vl_list_iteration", "SoA", "disabled"),
+]
+
+
+def write_rank_logs(job_path, rank, n_its=300, phases=(0, 150), phase_its=10):
+    """Writes iteration, liveinfo and tuning log of a short run tuning CONFIGS in each phase."""
+    with open(os.path.join(job_path, f"iterationLog_Rank{rank}.csv"), "w") as f:
+        f.write(
+            "Date,Iteration,Functor,Interaction Type,Container,CellSizeFactor,Traversal,Load Estimator,Data Layout,"
+            "Newton 3,inTuningPhase,computeInteractionsTotal[ns],remainderTraversal[ns],rebuildNeighborLists[ns],"
+            "tuning[ns]\n"
+        )
+        for i in range(n_its):
+            start = max(p for p in phases if p <= i)
+            tuning = i - start < phase_its
+            code = (i - start) % 2 if tuning else phases.index(start) % 2
+            container, csf, traversal, layout, n3 = CONFIGS[code]
+            total = 500000 + 1000 * rank + 100 * code + (i % 7) * 10
+            rebuild = 100000 if i % 10 == 0 else 0
+            f.write(
+                f"2024-01-01 00:00:00,{i},LJFunctorAVX,Pairwise,{container},{csf},{traversal},none,{layout},{n3},"
+                f"{'true' if tuning else 'false'},{total},0,{rebuild},0\n"
+            )
+
+    with open(os.path.join(job_path, f"liveinfoLog_Rank{rank}.csv"), "w") as f:
+        f.write("Date,Iteration,maxDensity\n")
+        for i in range(n_its):
+            f.write(f"2024-01-01 00:00:00,{i},{0.02 + 0.00001 * i:.6f}\n")
+
+    with open(os.path.join(job_path, f"tuningLog_Rank{rank}.txt"), "w") as f:
+        for start in phases:
+            f.write(f"reset {start}\n")
+            for i in range(start, start + phase_its):
+                container, csf, traversal, layout, n3 = CONFIGS[(i - start) % 2]
+                f.write(
+                    f"evidence {500000 + i} {i} {{Interaction Type: Pairwise , Container: {container} , "
+                    f"CellSizeFactor: {csf} , Traversal: {traversal} , Load Estimator: none , Data Layout: {layout} , "
+                    f"Newton 3: {n3}}}\n"
+                )
+
+
+@pytest.fixture
+def plot_data_dir(tmp_path, monkeypatch):
+    job_path = tmp_path / "output" / JOB
+    job_path.mkdir(parents=True)
+    for rank in [0, 1]:
+        write_rank_logs(job_path, rank)
+    monkeypatch.setattr(plot_util, "PLOT_DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def run_main(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["plot_util.py", "--draft", "--all-ranks", *args])
+    plot_util.main()
+    return capsys.readouterr().out
+
+
+def test_incremental_rerun_of_all_ranks_renders_nothing(plot_data_dir, monkeypatch, capsys):
+    job_path = plot_data_dir / "output" / JOB
+
+    out = run_main(monkeypatch, capsys)
+    assert "[2/2]" in out
+    figures = sorted(f for f in os.listdir(job_path) if f.endswith(".png"))
+    assert figures == sorted(f"{name}.png" for rank in [0, 1] for name, _, _ in plot_util.job_figures(rank))
+    mtimes = {f: os.stat(job_path / f).st_mtime_ns for f in figures}
+
+    out = run_main(monkeypatch, capsys)
+    assert "Plotting" not in out
+    for rank in [0, 1]:
+        assert f"{JOB} rank {rank} are up to date" in out
+    assert {f: os.stat(job_path / f).st_mtime_ns for f in figures} == mtimes
+
+
+def test_changed_log_renders_only_its_rank(plot_data_dir, monkeypatch, capsys):
+    job_path = plot_data_dir / "output" / JOB
+    run_main(monkeypatch, capsys)
+
+    with open(job_path / "tuningLog_Rank1.txt", "a") as f:
+        f.write("\n")
+    out = run_main(monkeypatch, capsys)
+    assert f"{JOB} rank 0 are up to date" in out
+    assert "[1/1]" in out and f"{JOB} rank 1 done" in out
+
+
+def test_jitter_filtered_figures_depend_on_the_config_read(tmp_path, monkeypatch):
+    job_path = tmp_path / "output" / JOB
+    job_path.mkdir(parents=True)
+    default = tmp_path / "experiments" / "exploding-liquid" / "default.yaml"
+    default.parent.mkdir(parents=True)
+    default.write_text("thermostat:\n  thermostatInterval: 10\n")
+    monkeypatch.setattr(plot_util, "CONFIG_DIR", str(tmp_path / "experiments"))
+
+    jitter_filter = plot_util.load_jitter_filter(os.devnull)
+    assert plot_util.job_inputs(str(job_path), 0)[-1].endswith("tuningLog_Rank0.txt")
+    # without a config.yaml of its own, the job is filtered with the default of its scenario
+    assert plot_util.job_inputs(str(job_path), 0, jitter_filter)[-1] == str(default)
+    (job_path / "config.yaml").write_text("thermostat:\n  thermostatInterval: 20\n")
+    assert plot_util.job_inputs(str(job_path), 0, jitter_filter)[-1] == str(job_path / "config.yaml")
+
+
+def test_reference_schedule_predicts_the_recorded_runtime(tmp_path):
+    job_path = tmp_path / JOB
+    job_path.mkdir()
+    write_rank_logs(job_path, 0, n_its=600, phases=(0, 150, 320), phase_its=10)
+    reference = load_run(str(tmp_path), JOB)
+
+    # triggering in the row before each recorded phase replays the schedule of the reference itself
+    triggers = reference.phases["first_row"][1:] - 1
+    prediction = reference.predict_runtime(triggers)
+    assert prediction["predicted"] == pytest.approx(prediction["recorded"])
+    assert prediction["tuning_its"] == 30
+    # like the cost of the tuning phases, both count the neighbor list rebuilds
+    total = np.loadtxt(job_path / "iterationLog_Rank0.csv", delimiter=",", skiprows=1, usecols=11).sum()
+    assert prediction["recorded"] == pytest.approx(total)